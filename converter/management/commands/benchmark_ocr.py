@@ -0,0 +1,105 @@
+import os
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from converter.utils.pdf_processor import PDFProcessor
+from converter.utils.inference_profile import get_profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence de bout en bout de l'extraction des coordonnées (pages/s) selon le "
+        "nombre de processus OCR et la taille des lots. "
+        "Exemple : python manage.py benchmark_ocr plan.pdf --workers 1,2,4,8 --batch-sizes 4,8. "
+        "Le tableau affiché donne le débit et l'accélération par rapport à la première "
+        "configuration (OCR page par page) ; les modèles sont chargés avant la mesure. "
+        "Avec --profiles accurate,balanced,fast, compare plutôt les profils d'inférence CPU : "
+        "latence et concordance des coordonnées avec le premier profil de la liste. "
+        "Procédure et résultats de référence : docs/benchmark_ocr.md."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pdf_path', help='PDF de référence')
+        parser.add_argument('--workers', default='1,2,4', help='Nombres de processus OCR à comparer')
+        parser.add_argument('--batch-sizes', default='', help='Tailles de lots OCR à comparer (sans pool)')
+        parser.add_argument('--repeat', type=int, default=1, help='Nombre de passes mesurées')
+        parser.add_argument('--profiles', default='', help="Profils d'inférence à comparer (le premier sert de référence)")
+
+    def handle(self, *args, **options):
+        pdf_path = options['pdf_path']
+        if not os.path.exists(pdf_path):
+            raise CommandError(f"Fichier introuvable : {pdf_path}")
+        if options['profiles']:
+            return self.compare_profiles(pdf_path, options['profiles'].split(','), options['repeat'])
+
+        configs = [(int(n), 1) for n in options['workers'].split(',')]
+        configs += [(1, int(n)) for n in options['batch_sizes'].split(',') if n and int(n) > 1]
+        reference = None
+        baseline = None
+
+        self.stdout.write(
+            f"{'processus':>10} {'lot':>4} {'pages':>6} {'durée (s)':>10} {'pages/s':>8} {'accél.':>7}"
+        )
+        for workers, batch_size in configs:
+            processor = PDFProcessor(ocr_workers=workers)
+            processor.ocr_batch_size = batch_size
+            coordinates, page_count, elapsed = self.measure(processor, pdf_path, options['repeat'])
+
+            throughput = page_count / elapsed if elapsed else 0.0
+            baseline = baseline or throughput
+            speedup = throughput / baseline if baseline else 0.0
+            self.stdout.write(
+                f"{workers:>10} {batch_size:>4} {page_count:>6} {elapsed:>10.2f} {throughput:>8.2f} {speedup:>6.2f}x"
+            )
+
+            # Les résultats doivent être identiques quelle que soit la configuration
+            if reference is None:
+                reference = coordinates
+            elif coordinates != reference:
+                self.stderr.write(f"Résultats différents avec {workers} processus et des lots de {batch_size}")
+
+    def measure(self, processor, pdf_path, repeat):
+        """Passe de chauffe puis `repeat` passes mesurées ; retourne (coordonnées, pages, durée moyenne)"""
+        # Mesurer l'OCR lui-même, sans couche texte ni cache par page
+        processor.use_text_layer = False
+        processor.page_cache = None
+        pages = []
+        coordinates = processor.extract_coordinates(
+            pdf_path, progress_callback=lambda stage, current, total: pages.append(total)
+        )
+        start = time.perf_counter()
+        for _ in range(repeat):
+            coordinates = processor.extract_coordinates(pdf_path)
+        elapsed = (time.perf_counter() - start) / repeat
+        processor.close()
+        return coordinates, max([p for p in pages if p] or [0]), elapsed
+
+    def compare_profiles(self, pdf_path, profiles, repeat):
+        """Latence et concordance des coordonnées de chaque profil avec le premier"""
+        profiles = [name.strip() for name in profiles if name.strip()]
+        for name in profiles:
+            try:
+                get_profile(name)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{'profil':>10} {'dpi':>5} {'int8':>5} {'threads':>8} {'durée (s)':>10} {'pages/s':>8} "
+            f"{'points':>7} {'concord.':>9}"
+        )
+        reference = None
+        for name in profiles:
+            processor = PDFProcessor(ocr_workers=1, profile=name)
+            coordinates, page_count, elapsed = self.measure(processor, pdf_path, repeat)
+
+            # Concordance : part des paires (page, X, Y) de la référence retrouvées à l'identique
+            pairs = Counter(zip(coordinates.page.tolist(), coordinates.X.tolist(), coordinates.Y.tolist()))
+            if reference is None:
+                reference = pairs
+            matched = sum((pairs & reference).values())
+            agreement = matched / sum(reference.values()) if reference else 1.0
+            throughput = page_count / elapsed if elapsed else 0.0
+            self.stdout.write(
+                f"{processor.profile['name']:>10} {processor.dpi:>5} {'oui' if processor.quantize else 'non':>5} "
+                f"{processor.threads:>8} {elapsed:>10.2f} {throughput:>8.2f} {len(coordinates):>7} {agreement:>8.1%}"
+            )
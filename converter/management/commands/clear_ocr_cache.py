@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from converter.utils.pdf_processor import PIPELINE_VERSION
+from converter.utils.result_cache import ResultCache
+
+# Caches produits par le pipeline OCR : coordonnées par plan, détections par page
+NAMESPACES = ('coordinates', 'pages')
+
+
+class Command(BaseCommand):
+    help = (
+        "Invalide les caches OCR (coordonnées et pages) : supprime les entrées produites par "
+        "une autre version du pipeline OCR, ou toutes les entrées avec --all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Vider entièrement les caches')
+        parser.add_argument(
+            '--namespace', choices=NAMESPACES, action='append',
+            help='Cache à traiter (répétable ; par défaut tous)'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for namespace in options['namespace'] or NAMESPACES:
+            removed = ResultCache(namespace, PIPELINE_VERSION).invalidate(all_versions=options['all'])
+            self.stdout.write(f"{namespace} : {removed} entrées supprimées")
+            total += removed
+        self.stdout.write(f"{total} entrées supprimées")
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from converter.utils.ocr_server import OCRServer
+from converter.utils.inference_profile import get_profile, available_cpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Démarre le serveur OCR partagé : un seul jeu de modèles EasyOCR sert, par socket Unix, "
+        "tous les workers web lancés avec la même variable OCR_SERVER_SOCKET."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.OCR_SERVER_SOCKET, help='Chemin du socket Unix')
+        parser.add_argument('--max-batch', type=int, default=settings.OCR_SERVER_MAX_BATCH)
+        parser.add_argument('--max-wait', type=float, default=settings.OCR_SERVER_MAX_WAIT)
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError("Indiquez --socket ou la variable OCR_SERVER_SOCKET")
+        OCRServer(
+            options['socket'],
+            max_batch=options['max_batch'],
+            max_wait=options['max_wait'],
+            recognizer_batch_size=settings.OCR_RECOGNIZER_BATCH_SIZE,
+            quantize=get_profile()['quantize'],
+            # Seul processus d'inférence de l'instance : il dispose de tous les cœurs
+            threads=settings.OCR_THREADS or available_cpus()
+        ).serve_forever()
@@ -0,0 +1,63 @@
+import re
+import sys
+import json
+import subprocess
+from django.core.management.base import BaseCommand, CommandError
+
+# Ligne produite par python -X importtime : "import time: self | cumulé | module"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# Ce que charge un worker web au démarrage
+BOOT_CODE = (
+    "import os, django;"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hiconvert.settings');"
+    "django.setup();"
+    "import hiconvert.urls"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rapport du temps de démarrage d'un worker web : temps d'import par module, mesuré "
+        "dans un interpréteur neuf avec python -X importtime. À comparer entre deux versions "
+        "pour détecter les régressions de démarrage à froid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Nombre de modules affichés')
+        parser.add_argument('--prefix', default='', help='Ne garder que les modules commençant par ce préfixe')
+        parser.add_argument('--json', action='store_true', help='Sortie JSON (suivi automatisé)')
+
+    def handle(self, *args, **options):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+            capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            raise CommandError(f"Échec du démarrage mesuré :\n{process.stderr[-2000:]}")
+
+        modules = []
+        for line in process.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append({
+                    'module': name,
+                    'self_ms': int(self_us) / 1000,
+                    'cumulative_ms': int(cumulative_us) / 1000,
+                    'top_level': len(indent) <= 1
+                })
+
+        total_ms = sum(m['cumulative_ms'] for m in modules if m['top_level'])
+        selected = [m for m in modules if m['module'].startswith(options['prefix'])]
+        selected.sort(key=lambda m: m['cumulative_ms'], reverse=True)
+        selected = selected[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'total_ms': round(total_ms, 1), 'modules': selected}, indent=2))
+            return
+
+        self.stdout.write(f"Temps total d'import : {total_ms:.1f} ms ({len(modules)} modules)")
+        self.stdout.write(f"{'cumulé (ms)':>12} {'propre (ms)':>12}  module")
+        for m in selected:
+            self.stdout.write(f"{m['cumulative_ms']:>12.1f} {m['self_ms']:>12.1f}  {m['module']}")
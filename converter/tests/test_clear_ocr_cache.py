@@ -0,0 +1,46 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from converter.utils.pdf_processor import PIPELINE_VERSION
+
+
+class ClearOcrCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        settings_override = override_settings(CACHE_FOLDER=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for namespace in ('coordinates', 'pages'):
+            os.makedirs(os.path.join(self.cache_dir, namespace))
+            self.write(namespace, 'current', PIPELINE_VERSION)
+            self.write(namespace, 'stale', 'obsolete')
+
+    def write(self, namespace, name, version):
+        with open(os.path.join(self.cache_dir, namespace, f"{name}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'value': None}, f)
+
+    def remaining(self, namespace):
+        return sorted(os.listdir(os.path.join(self.cache_dir, namespace)))
+
+    def test_stale_entries_are_removed_from_both_caches(self):
+        call_command('clear_ocr_cache', stdout=StringIO())
+
+        self.assertEqual(self.remaining('coordinates'), ['current.json'])
+        self.assertEqual(self.remaining('pages'), ['current.json'])
+
+    def test_all_purges_both_caches(self):
+        call_command('clear_ocr_cache', '--all', stdout=StringIO())
+
+        self.assertEqual(self.remaining('coordinates'), [])
+        self.assertEqual(self.remaining('pages'), [])
+
+    def test_namespace_limits_the_purge(self):
+        call_command('clear_ocr_cache', '--all', '--namespace', 'pages', stdout=StringIO())
+
+        self.assertEqual(self.remaining('coordinates'), ['current.json', 'stale.json'])
+        self.assertEqual(self.remaining('pages'), [])
@@ -0,0 +1,133 @@
+from django.test import SimpleTestCase
+from converter.utils.coordinate_parser import parse_coordinates
+from converter.utils.pdf_processor import COORDINATE_PATTERN, MIN_COORDINATE
+
+# Colonnes du tableau de coordonnées (abscisse gauche des cellules) et hauteur de ligne
+X_COLUMN, Y_COLUMN, ROW_HEIGHT = 300, 420, 24
+
+
+def box(x, y, width=90, height=14):
+    """Boîte EasyOCR (4 coins) d'une détection"""
+    return [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+
+
+def cell(text, x, row, confidence=0.9):
+    return (box(x, 200 + row * ROW_HEIGHT), text, confidence)
+
+
+def table(rows):
+    """Détections d'un tableau à deux colonnes, ligne par ligne (None : cellule non lue)"""
+    detections = []
+    for row, (x_text, y_text) in enumerate(rows):
+        if x_text is not None:
+            detections.append(cell(x_text, X_COLUMN, row))
+        if y_text is not None:
+            detections.append(cell(y_text, Y_COLUMN, row))
+    return detections
+
+
+def legacy_pairs(pages):
+    """Ancien appariement : tous les nombres dans l'ordre des détections, pris deux à deux"""
+    numbers = []
+    for _, detections in pages:
+        for _, text, _ in detections:
+            values = [float(number) for number in COORDINATE_PATTERN.findall(text)]
+            numbers.extend(value for value in values if value > MIN_COORDINATE)
+    return [(numbers[i], numbers[i + 1]) for i in range(0, len(numbers) - 1, 2)]
+
+
+def pairs(pages):
+    result = parse_coordinates(pages)
+    return list(zip(result['X'].tolist(), result['Y'].tolist()))
+
+
+ROWS = [
+    ('612345.10', '712345.20'),
+    ('612350.55', '712360.05'),
+    ('612371.00', '712388.75'),
+    ('612402.30', '712391.40')
+]
+EXPECTED = [(float(x), float(y)) for x, y in ROWS]
+
+
+class LegacyEquivalenceTests(SimpleTestCase):
+    """Sur un flux propre, le nouvel appariement donne exactement les paires de l'ancienne boucle"""
+
+    def assertSameAsLegacy(self, detections):
+        pages = [(1, detections)]
+        self.assertEqual(pairs(pages), legacy_pairs(pages))
+        return pairs(pages)
+
+    def test_one_detection_per_cell(self):
+        self.assertEqual(self.assertSameAsLegacy(table(ROWS)), EXPECTED)
+
+    def test_one_detection_per_row(self):
+        detections = [
+            (box(X_COLUMN, 200 + row * ROW_HEIGHT, width=210), f"{x}   {y}", 0.8)
+            for row, (x, y) in enumerate(ROWS)
+        ]
+        self.assertEqual(self.assertSameAsLegacy(detections), EXPECTED)
+
+    def test_split_decimals(self):
+        # La partie décimale lue comme une détection séparée est écartée (moins de 5 chiffres)
+        detections = []
+        for row, (x, y) in enumerate(ROWS):
+            integer, decimals = x.split('.')
+            detections.append(cell(f"{integer}.", X_COLUMN, row))
+            detections.append((box(X_COLUMN + 70, 200 + row * ROW_HEIGHT, width=20), decimals, 0.6))
+            detections.append(cell(y, Y_COLUMN, row))
+
+        result = self.assertSameAsLegacy(detections)
+
+        self.assertEqual(result, [(float(x.split('.')[0]), float(y)) for x, y in ROWS])
+
+    def test_values_below_coordinate_range_are_ignored(self):
+        detections = table(ROWS)
+        # Numéro de borne, surface, identifiant à 5 chiffres : sous MIN_COORDINATE
+        detections.insert(2, (box(100, 200 + ROW_HEIGHT, width=60), 'B12', 0.9))
+        detections.insert(0, (box(100, 150, width=120), 'Surface 2345.60 m2', 0.9))
+        detections.append((box(100, 400, width=80), '99999.9', 0.9))
+
+        self.assertEqual(self.assertSameAsLegacy(detections), EXPECTED)
+
+    def test_single_column_list_is_paired_in_reading_order(self):
+        values = [value for row in ROWS for value in row]
+        detections = [(box(X_COLUMN, 200 + i * ROW_HEIGHT), value, 0.9) for i, value in enumerate(values)]
+
+        self.assertEqual(self.assertSameAsLegacy(detections), EXPECTED)
+
+
+class PairingRobustnessTests(SimpleTestCase):
+    """Un nombre manquant ou en trop ne décale plus que sa propre ligne"""
+
+    def test_dropped_token_only_loses_its_row(self):
+        rows = list(ROWS)
+        rows[1] = (rows[1][0], None)
+        pages = [(1, table(rows))]
+
+        self.assertEqual(pairs(pages), [EXPECTED[0], EXPECTED[2], EXPECTED[3]])
+        # L'ancienne boucle décalait toutes les paires suivantes
+        self.assertNotEqual(legacy_pairs(pages)[1:], [EXPECTED[2], EXPECTED[3]])
+
+    def test_stray_number_above_the_table_is_ignored(self):
+        detections = [(box(100, 120, width=240), 'Titre foncier n° 1234567', 0.95)] + table(ROWS)
+        pages = [(1, detections)]
+
+        self.assertEqual(pairs(pages), EXPECTED)
+        self.assertNotEqual(legacy_pairs(pages), EXPECTED)
+
+    def test_stray_column_left_of_the_table_does_not_swap_roles(self):
+        detections = table(ROWS)
+        # Colonne d'identifiants parcellaires à gauche, lue sur une ligne sur deux
+        detections += [cell(f"{4000000 + row}", 150, row) for row in (0, 2)]
+        pages = [(1, detections)]
+
+        self.assertEqual(pairs(pages), EXPECTED)
+
+    def test_pairs_keep_their_page_and_lower_confidence(self):
+        detections = [cell('612345.10', X_COLUMN, 0, 0.95), cell('712345.20', Y_COLUMN, 0, 0.55)]
+
+        result = parse_coordinates([(3, table(ROWS[1:])), (7, detections)])
+
+        self.assertEqual(result['page'].tolist(), [3, 3, 3, 7])
+        self.assertAlmostEqual(result['confidence'][-1], 0.55)
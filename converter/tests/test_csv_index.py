@@ -0,0 +1,32 @@
+from io import BytesIO
+from django.test import SimpleTestCase
+from converter.utils.csv_index import CsvIndex
+
+
+class CsvIndexTests(SimpleTestCase):
+    def test_blank_lines_between_rows_are_skipped(self):
+        index = CsvIndex(BytesIO(b'X,Y\n1,2\n\n3,4\n5,6\n'))
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.page(page_size=10)['rows'], [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+
+    def test_sorted_page_reads_rows_out_of_order(self):
+        index = CsvIndex(BytesIO(b'X;Y\r\n3;b\r\n1;a\r\n2;c\r\n'))
+
+        page = index.page(page_size=2, sort='X', descending=True)
+
+        self.assertEqual(page['rows'], [[3.0, 'b'], [2.0, 'c']])
+        self.assertEqual(index.page(page=2, page_size=2, sort='Y')['rows'], [[2.0, 'c']])
+
+
+class CsvIndexCacheTests(SimpleTestCase):
+    def test_evicted_indexes_are_closed(self):
+        from converter import views
+        from converter.utils.ttl_cache import TTLCache
+
+        cache = TTLCache(max_size=1, on_evict=views.csv_indexes.on_evict)
+        first = cache.get_or_load('a', lambda: CsvIndex(BytesIO(b'X,Y\n1,2\n')))
+        second = cache.get_or_load('b', lambda: CsvIndex(BytesIO(b'X,Y\n3,4\n')))
+
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
@@ -0,0 +1,107 @@
+import io
+import os
+import tempfile
+import threading
+import uuid
+import zipfile
+from unittest import mock
+from django.test import SimpleTestCase
+from django.urls import reverse
+from converter import views
+from converter.utils.job_queue import JobQueue
+from converter.utils.plan_records import PlanRecords
+
+
+class ExportTestCase(SimpleTestCase):
+    """File d'attente et registre des plans propres au test, à la place de ceux des vues"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue = JobQueue(max_workers=1, state_dir=directory.name)
+        self.addCleanup(self.queue.executor.shutdown)
+        self.records = PlanRecords(os.path.join(directory.name, 'records'))
+        for name, value in (('job_queue', self.queue), ('plan_records', self.records)):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_job(self, func, kind):
+        job_id = self.queue.submit(func, kind=kind)
+        self.queue.executor.submit(lambda: None).result(5)
+        return job_id
+
+
+class ReportJobTests(ExportTestCase):
+    def test_export_of_report_job_is_rejected(self):
+        job_id = self.run_job(lambda job: {'report_url': '/report/x'}, 'report')
+
+        response = self.client.get(reverse('export_jobs'), {'jobs': job_id})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['jobs'], [job_id])
+
+    def test_finished_report_renders_are_forgotten(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        done_id = self.run_job(lambda job: {}, 'report')
+        running_id = self.queue.submit(lambda job: release.wait(5) and {}, kind='report')
+        with mock.patch.dict(views.pending_reports, {'done': done_id, 'running': running_id}, clear=True):
+            with views.report_lock:
+                views.prune_pending_reports()
+            self.assertEqual(views.pending_reports, {'running': running_id})
+
+
+class FakeStorage:
+    """Stockage en mémoire : le contenu de chaque fichier est dérivé de son ID"""
+
+    def open(self, file_id):
+        return io.BytesIO(f"contenu de {file_id}".encode('utf-8'))
+
+
+def plan_result(folder):
+    stored = lambda name: {'name': name, 'file_id': f"{folder}-{name}", 'download_url': '', 'view_url': ''}
+    return {
+        'pdf': stored(f"{folder}.pdf"),
+        'csv': stored(f"{folder}.csv"),
+        'outputs': {'geojson': stored(f"{folder}.geojson")}
+    }
+
+
+class PlanExportTests(ExportTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(views, 'get_storage', FakeStorage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export(self, job_ids):
+        response = self.client.get(reverse('export_jobs'), {'jobs': ','.join(job_ids)})
+        self.assertEqual(response.status_code, 200)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_recorded_jobs_are_exported_after_their_state_is_pruned(self):
+        job_id = uuid.uuid4().hex
+        self.records.save(job_id, [plan_result('Parcelle A')])
+        self.assertIsNone(self.queue.get(job_id))
+
+        archive = self.export([job_id])
+
+        self.assertEqual(archive.namelist(), [
+            'Parcelle A/Parcelle A.pdf', 'Parcelle A/Parcelle A.csv', 'Parcelle A/Parcelle A.geojson'
+        ])
+        self.assertEqual(archive.read('Parcelle A/Parcelle A.csv'), 'contenu de Parcelle A-Parcelle A.csv'.encode())
+
+    def test_duplicate_plan_folders_are_suffixed(self):
+        job_ids = [uuid.uuid4().hex for _ in range(3)]
+        for job_id in job_ids:
+            self.records.save(job_id, [plan_result('Plan')])
+
+        folders = {name.split('/')[0] for name in self.export(job_ids).namelist()}
+
+        self.assertEqual(folders, {'Plan', 'Plan_2', 'Plan_3'})
+
+    def test_unknown_job_is_not_found(self):
+        response = self.client.get(reverse('export_jobs'), {'jobs': uuid.uuid4().hex})
+
+        self.assertEqual(response.status_code, 404)
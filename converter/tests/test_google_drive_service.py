@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from unittest import mock
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMock, HttpMockSequence
+from converter.utils.google_drive_service import GoogleDriveService
+
+BOUNDARY = 'batch_hiconvert'
+
+
+def batch_response(parts):
+    """Réponse multipart d'une requête batch Drive : [(ID de la requête, statut HTTP)]"""
+    body = ''
+    for request_id, status in parts:
+        payload = {'id': 'permission'} if status == 200 else {'error': {'code': status, 'message': 'échec'}}
+        body += (
+            f'--{BOUNDARY}\r\n'
+            'Content-Type: application/http\r\n'
+            'Content-Transfer-Encoding: binary\r\n'
+            f'Content-ID: <response-batch + {request_id}>\r\n\r\n'
+            f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}\r\n'
+            'Content-Type: application/json\r\n\r\n'
+            f'{json.dumps(payload)}\r\n'
+        )
+    body += f'--{BOUNDARY}--'
+    return ({'status': '200', 'content-type': f'multipart/mixed; boundary="{BOUNDARY}"'}, body)
+
+
+class FakeDriveHttp:
+    """
+    Stand-in local de l'API Drive : chaque upload reprenable reçoit sa propre séquence
+    (initialisation puis envoi du contenu, renvoyé tel quel comme réponse), les lots de
+    permissions consomment les réponses préparées dans l'ordre.
+    """
+
+    def __init__(self, batches, upload_delays=None):
+        self.batches = list(batches)
+        self.batch_requests = []
+        self.upload_delays = upload_delays or {}
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        if threading.current_thread().name.startswith('hiconvert-drive'):
+            return self.upload_http()
+        with self.lock:
+            http = HttpMockSequence([self.batches.pop(0)])
+        self.batch_requests.append(http)
+        return http
+
+    def upload_http(self):
+        delays = self.upload_delays
+
+        class DelayedSequence(HttpMockSequence):
+            def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+                if method == 'PUT' and body is not None:
+                    body = body.read() if hasattr(body, 'read') else body
+                    # Les premiers fichiers finissent en dernier : l'ordre des résultats ne doit pas en dépendre
+                    time.sleep(delays.get(json.loads(body)['id'], 0))
+                return super().request(uri, method, body, headers, *args, **kwargs)
+
+        return DelayedSequence([
+            ({'status': '200', 'location': 'https://www.googleapis.com/upload/drive/v3/files?upload_id=test'}, ''),
+            ({'status': '200'}, 'echo_request_body')
+        ])
+
+
+class DriveUploadTests(SimpleTestCase):
+    def setUp(self):
+        with mock.patch.object(GoogleDriveService, 'initialize_service'):
+            self.drive = GoogleDriveService()
+        self.drive.service = build('drive', 'v3', http=HttpMock(), static_discovery=True)
+        self.drive.max_retries = 2
+        self.drive.retry_backoff = 0
+        self.drive.upload_concurrency = 4
+
+    def files(self, count):
+        # Le contenu de chaque fichier est la réponse JSON que renverra l'upload (voir FakeDriveHttp)
+        return [
+            (File(ContentFile(json.dumps({'id': f'file-{index}'}).encode()), name=f'plan_{index}.csv'), 'text/csv')
+            for index in range(count)
+        ]
+
+    def test_concurrent_uploads_keep_input_order(self):
+        fake = FakeDriveHttp(
+            [batch_response([(f'file-{index}', 200) for index in range(4)])],
+            upload_delays={'file-0': 0.2, 'file-1': 0.1}
+        )
+        self.drive._http = fake
+
+        results = self.drive.upload_files(self.files(4))
+
+        self.assertEqual([result['file_id'] for result in results], ['file-0', 'file-1', 'file-2', 'file-3'])
+        self.assertEqual(self.drive.get_cached_metadata('file-2')['name'], 'plan_2.csv')
+
+    def test_permissions_are_granted_in_a_single_batch(self):
+        fake = FakeDriveHttp([batch_response([(f'file-{index}', 200) for index in range(3)])])
+        self.drive._http = fake
+
+        self.drive.upload_files(self.files(3))
+
+        self.assertEqual(len(fake.batch_requests), 1)
+        self.assertEqual(fake.batches, [])
+
+    def test_transient_permission_failures_are_retried(self):
+        fake = FakeDriveHttp([
+            batch_response([('file-0', 200), ('file-1', 503), ('file-2', 429)]),
+            batch_response([('file-1', 200), ('file-2', 200)])
+        ])
+        self.drive._http = fake
+
+        results = self.drive.upload_files(self.files(3))
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(fake.batch_requests), 2)
+
+    def test_non_transient_permission_failure_is_raised(self):
+        fake = FakeDriveHttp([batch_response([('file-0', 200), ('file-1', 403)])])
+        self.drive._http = fake
+
+        with self.assertRaises(HttpError) as context:
+            self.drive.upload_files(self.files(2))
+
+        self.assertEqual(context.exception.resp.status, 403)
+        self.assertEqual(len(fake.batch_requests), 1)
@@ -0,0 +1,22 @@
+import sys
+import subprocess
+from django.conf import settings
+from django.test import SimpleTestCase
+
+SCRIPT = """
+import os, sys, django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hiconvert.settings')
+django.setup()
+import hiconvert.urls
+print(','.join(name for name in ('numpy', 'pandas', 'cv2', 'torch') if name in sys.modules))
+"""
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_views_do_not_import_numerical_stack(self):
+        # Processus neuf : les autres tests ont pu charger numpy dans celui-ci
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT], cwd=str(settings.BASE_DIR),
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), '')
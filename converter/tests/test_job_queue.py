@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from django.test import SimpleTestCase
+from converter.utils.job_queue import JobQueue
+
+
+class OrphanedJobTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue = JobQueue(max_workers=1, state_dir=directory.name)
+        self.addCleanup(self.queue.executor.shutdown)
+
+    def write_state(self, job_id, **fields):
+        state = {'id': job_id, 'status': 'running', 'updated_at': time.time(), **fields}
+        with open(self.queue._state_path(job_id), 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def test_job_of_dead_worker_is_marked_as_error(self):
+        worker = subprocess.Popen([sys.executable, '-c', 'pass'])
+        worker.wait()
+        self.write_state('a' * 32, owner_pid=worker.pid)
+
+        state = self.queue.get('a' * 32)
+
+        self.assertEqual(state['status'], 'error')
+        self.assertIn('interrompu', state['error'])
+
+    def test_job_without_heartbeat_is_marked_as_error(self):
+        self.write_state('b' * 32, owner_pid=None, updated_at=time.time() - self.queue.stale_after - 1)
+
+        self.assertEqual(self.queue.get('b' * 32)['status'], 'error')
+
+    def test_job_of_this_process_not_running_here_is_marked_as_error(self):
+        self.write_state('c' * 32, owner_pid=os.getpid())
+
+        self.assertEqual(self.queue.get('c' * 32)['status'], 'error')
+
+    def test_live_job_is_kept_and_heartbeat_refreshes_it(self):
+        self.queue.heartbeat_interval = 0.05
+        release = threading.Event()
+        job_id = self.queue.submit(lambda job: release.wait(5) and [])
+        self.addCleanup(release.set)
+
+        first = self.queue.get(job_id)['updated_at']
+        time.sleep(0.3)
+        state = self.queue.get(job_id)
+
+        self.assertIn(state['status'], ('queued', 'running'))
+        self.assertGreater(state['updated_at'], first)
+        release.set()
+        states = list(self.queue.watch([job_id], interval=0.01, timeout=5))
+        self.assertEqual(states[-1]['status'], 'done')
+
+
+class DedicatedExecutorTests(SimpleTestCase):
+    def test_dedicated_kind_does_not_wait_behind_other_jobs(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        queue = JobQueue(max_workers=1, state_dir=directory.name, dedicated={'report': 1})
+        self.addCleanup(queue.executors['report'].shutdown)
+        self.addCleanup(queue.executor.shutdown)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        queue.submit(lambda job: release.wait(5) and [], kind='plan')
+        queued_plan = queue.submit(lambda job: [], kind='plan')
+        report = queue.submit(lambda job: {'report_url': '/report/x'}, kind='report')
+        queue.executors['report'].submit(lambda: None).result(5)
+
+        self.assertEqual(queue.get(report)['status'], 'done')
+        self.assertEqual(queue.get(report)['kind'], 'report')
+        # Le pool des plans est toujours occupé par le premier traitement
+        self.assertEqual(queue.get(queued_plan)['status'], 'queued')
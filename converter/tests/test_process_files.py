@@ -0,0 +1,71 @@
+import tempfile
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import reverse
+from converter import views
+from converter.utils.job_queue import JobQueue
+from converter.utils.upload_filter import PlanUploadHandler
+
+
+def received_files(paths):
+    """Requête d'envoi d'un dossier, lue par PlanUploadHandler comme dans process_files"""
+    files = [SimpleUploadedFile(path.split('/')[-1], b'%PDF-1.4 ' + path.encode()) for path in paths]
+    request = RequestFactory().post('/process', {'folder': files, 'paths': paths})
+    request.upload_handlers = [PlanUploadHandler(request)]
+    request.FILES
+    return request
+
+
+class DiscoverPlansTests(SimpleTestCase):
+    def test_plans_are_named_after_their_parent_folder(self):
+        request = received_files([
+            'Lot/Parcelle A/photo.jpg',
+            'Lot/Parcelle A/plan.pdf',
+            'Lot/Parcelle A/annexes/PLAN.PDF',
+            'Lot/Parcelle B/notes.txt',
+            'Lot/Parcelle B/plan.pdf',
+            'Archive/Parcelle A/plan.pdf',
+            'plan.pdf'
+        ])
+        # Les plans reçus réservent du budget mémoire jusqu'à leur fermeture
+        self.addCleanup(request.close)
+
+        plans, invalid = views.discover_plans(request)
+
+        self.assertEqual(
+            [(folder, pdf.read()) for folder, pdf in plans],
+            [
+                ('Parcelle A', b'%PDF-1.4 Lot/Parcelle A/plan.pdf'),
+                ('annexes', b'%PDF-1.4 Lot/Parcelle A/annexes/PLAN.PDF'),
+                ('Parcelle B', b'%PDF-1.4 Lot/Parcelle B/plan.pdf'),
+                ('Parcelle A_2', b'%PDF-1.4 Archive/Parcelle A/plan.pdf')
+            ]
+        )
+        # plan.pdf à la racine de l'envoi : pas de dossier parent
+        self.assertEqual(invalid, 1)
+
+
+class ProcessFilesTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        queue = JobQueue(max_workers=1, state_dir=directory.name)
+        self.addCleanup(queue.executor.shutdown)
+        for name, value in (('job_queue', queue), ('process_plan', lambda job, pdf, *args: pdf.close() or [])):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_upload_returns_accepted_jobs_without_waiting(self):
+        response = self.client.post(reverse('process_files'), {
+            'folder': [SimpleUploadedFile('plan.pdf', b'%PDF-1.4'), SimpleUploadedFile('photo.jpg', b'jpg')],
+            'paths': ['Parcelle A/plan.pdf', 'Parcelle A/photo.jpg']
+        })
+
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual([plan['folder'] for plan in data['plans']], ['Parcelle A'])
+        job_id = data['plans'][0]['job_id']
+        self.assertEqual(data['events_url'], f"{reverse('job_events')}?jobs={job_id}")
+        self.assertEqual(data['plans'][0]['status_url'], reverse('job_status', args=[job_id]))
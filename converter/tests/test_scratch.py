@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase, override_settings
+from converter.utils import scratch
+from converter.utils.scratch import memory_in_use, scratch_file
+
+
+@override_settings(PLAN_MEMORY_THRESHOLD=1024, PLAN_MEMORY_BUDGET=2048)
+class ScratchBudgetTests(SimpleTestCase):
+    def setUp(self):
+        if not (scratch.PROC_FD_AVAILABLE and hasattr(scratch.os, 'memfd_create')):
+            self.skipTest('memfd indisponible')
+
+    def test_queued_plans_spill_once_budget_is_spent(self):
+        files = [scratch_file(1000) for _ in range(3)]
+        try:
+            self.assertIsInstance(files[0], scratch.MemoryScratchFile)
+            self.assertIsInstance(files[1], scratch.MemoryScratchFile)
+            # Le budget de 2048 octets est pris : le troisième plan passe sur disque
+            self.assertNotIsInstance(files[2], scratch.MemoryScratchFile)
+            self.assertEqual(memory_in_use(), 2000)
+        finally:
+            for file in files:
+                file.close()
+        self.assertEqual(memory_in_use(), 0)
+
+    def test_closing_releases_budget_once(self):
+        file = scratch_file(1000)
+        file.write(b'%PDF-1.4')
+        file.seek(0)
+        self.assertEqual(file.read(), b'%PDF-1.4')
+        file.close()
+        file.close()
+        self.assertEqual(memory_in_use(), 0)
+        with scratch_file(1024) as other:
+            self.assertIsInstance(other, scratch.MemoryScratchFile)
+            self.assertEqual(memory_in_use(), 1024)
+        self.assertEqual(memory_in_use(), 0)
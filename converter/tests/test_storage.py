@@ -0,0 +1,106 @@
+import os
+import tempfile
+from django.test import RequestFactory, SimpleTestCase
+from converter.utils.storage import serve_file
+
+CONTENT = bytes(range(256)) * 40
+
+
+class ServeFileTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'plan.pdf')
+        with open(self.path, 'wb') as f:
+            f.write(CONTENT)
+        self.size = len(CONTENT)
+
+    def get(self, **headers):
+        request = RequestFactory().get('/view/x', headers=headers)
+        response = serve_file(request, self.path)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def test_full_response_carries_validators(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_bounded_range(self):
+        response = self.get(Range='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{self.size}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.body(response), CONTENT[10:20])
+
+    def test_suffix_range(self):
+        response = self.get(Range='bytes=-100')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {self.size - 100}-{self.size - 1}/{self.size}')
+        self.assertEqual(self.body(response), CONTENT[-100:])
+
+    def test_suffix_longer_than_file_returns_whole_file(self):
+        response = self.get(Range=f'bytes=-{self.size * 2}')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_open_ended_range(self):
+        response = self.get(Range=f'bytes={self.size - 5}-')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {self.size - 5}-{self.size - 1}/{self.size}')
+        self.assertEqual(self.body(response), CONTENT[-5:])
+
+    def test_range_end_is_clamped_to_file_size(self):
+        response = self.get(Range=f'bytes=0-{self.size + 1000}')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_unsatisfiable_ranges(self):
+        for header in (f'bytes={self.size}-', 'bytes=20-10', 'bytes=-0', 'bytes=-'):
+            with self.subTest(range=header):
+                response = self.get(Range=header)
+
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{self.size}')
+
+    def test_unsupported_range_returns_full_body(self):
+        response = self.get(Range='bytes=0-1,5-9')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+
+        current = self.get(Range='bytes=0-9', **{'If-Range': etag})
+        stale = self.get(Range='bytes=0-9', **{'If-Range': '"ancienne-version"'})
+
+        self.assertEqual(current.status_code, 206)
+        self.assertEqual(self.body(current), CONTENT[:10])
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.body(stale), CONTENT)
+
+    def test_conditional_get(self):
+        first = self.get()
+
+        cached = self.get(**{'If-None-Match': f'"autre", {first["ETag"]}'})
+        changed = self.get(**{'If-None-Match': '"autre"'})
+        not_modified = self.get(**{'If-Modified-Since': first['Last-Modified']})
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(not_modified.status_code, 304)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from PIL import Image
+from converter.utils import text_layer
+from converter.utils.pdf_processor import PDFProcessor
+
+
+def make_pdf(path, lines):
+    """PDF vectoriel d'une page contenant les lignes de texte (x, y, texte)"""
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path)
+    for x, y, text in lines:
+        pdf.drawString(x, y, text)
+    pdf.save()
+
+
+class FakeReader:
+    """Reader EasyOCR de test : renvoie un tableau de coordonnées raster"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def readtext(self, image, **options):
+        self.calls += 1
+        return [
+            ([[10, 10], [110, 10], [110, 30], [10, 30]], '612345.10', 0.9),
+            ([[200, 10], [300, 10], [300, 30], [200, 30]], '712345.20', 0.9)
+        ]
+
+
+class TextLayerSelectionTests(SimpleTestCase):
+    def setUp(self):
+        if not text_layer.is_available():
+            self.skipTest("pdfminer.six n'est pas installé")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pdf_path = os.path.join(directory.name, 'plan.pdf')
+
+        self.processor = PDFProcessor()
+        self.processor.use_text_layer = True
+        self.processor.use_roi = False
+        self.processor.ocr_batch_size = 1
+        self.processor.page_cache = None
+        self.reader = FakeReader()
+        self.processor._reader = self.reader
+
+    def extract(self):
+        telemetry = []
+        pages = lambda pdf_path, dpi, pages, **options: ((n, Image.new('L', (400, 200), 255)) for n in pages)
+        with mock.patch('converter.utils.pdf_processor.count_pages', return_value=1), \
+                mock.patch('converter.utils.pdf_processor.iter_pages', side_effect=pages):
+            coordinates = self.processor.extract_coordinates(self.pdf_path, telemetry=telemetry)
+        return coordinates, telemetry
+
+    def test_cartouche_only_page_goes_to_ocr(self):
+        # Seul texte vectoriel : le cartouche d'un plan scanné
+        make_pdf(self.pdf_path, [(72, 100, 'Titre foncier n° 1234567')])
+
+        coordinates, telemetry = self.extract()
+
+        self.assertEqual(telemetry[0]['source'], 'ocr')
+        self.assertEqual(self.reader.calls, 1)
+        self.assertEqual(coordinates.X.tolist(), [612345.1])
+        self.assertEqual(coordinates.Y.tolist(), [712345.2])
+
+    def test_vector_coordinate_table_skips_ocr(self):
+        lines = []
+        for row in range(3):
+            lines.append((100, 700 - row * 14, f'{412345 + row}.5'))
+            lines.append((300, 700 - row * 14, f'{812345 + row}.25'))
+        make_pdf(self.pdf_path, lines)
+
+        coordinates, telemetry = self.extract()
+
+        self.assertEqual(telemetry[0]['source'], 'text')
+        self.assertEqual(self.reader.calls, 0)
+        self.assertEqual(coordinates.X.tolist(), [412345.5, 412346.5, 412347.5])
+        self.assertEqual(coordinates.Y.tolist(), [812345.25, 812346.25, 812347.25])
@@ -0,0 +1,152 @@
+import threading
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+from converter.utils import ttl_cache
+from converter.utils.ttl_cache import TTLCache
+
+
+class Clock:
+    """Horloge monotone contrôlée par le test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(ttl_cache.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.evicted = []
+
+    def cache(self, **kwargs):
+        return TTLCache(on_evict=lambda key, value: self.evicted.append((key, value)), **kwargs)
+
+    def test_entries_expire_after_ttl(self):
+        cache = self.cache(ttl=10)
+        loads = []
+        load = lambda: loads.append(1) or len(loads)
+
+        self.assertEqual(cache.get_or_load('a', load), 1)
+        self.clock.now += 9
+        self.assertEqual(cache.get_or_load('a', load), 1)
+        self.clock.now += 2
+        self.assertEqual(cache.get_or_load('a', load), 2)
+        self.assertEqual(self.evicted, [('a', 1)])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = self.cache(max_size=2)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        # 'a' redevient la plus récente : 'b' sort à l'ajout de 'c'
+        self.assertEqual(cache.get_or_load('a', lambda: 'autre'), 'A')
+        cache.set('c', 'C')
+
+        self.assertEqual(self.evicted, [('b', 'B')])
+        self.assertEqual(cache.get_or_load('b', lambda: 'B2'), 'B2')
+        self.assertEqual(self.evicted, [('b', 'B'), ('a', 'A')])
+
+    def test_replaced_and_invalidated_values_are_evicted(self):
+        cache = self.cache()
+        cache.set('a', 'A')
+        cache.set('a', 'A2')
+        cache.invalidate('a')
+        cache.invalidate('absente')
+
+        self.assertEqual(self.evicted, [('a', 'A'), ('a', 'A2')])
+
+    def test_missing_resource_is_cached_for_negative_ttl(self):
+        cache = self.cache(ttl=300, negative_ttl=5, is_missing=lambda error: isinstance(error, FileNotFoundError))
+        calls = []
+
+        def load():
+            calls.append(1)
+            raise FileNotFoundError('absent')
+
+        for _ in range(3):
+            with self.assertRaises(FileNotFoundError):
+                cache.get_or_load('x', load)
+        self.assertEqual(len(calls), 1)
+
+        self.clock.now += 6
+        self.assertEqual(cache.get_or_load('x', lambda: 'présent'), 'présent')
+        # L'entrée négative n'est pas transmise à on_evict
+        self.assertEqual(self.evicted, [])
+
+    def test_other_errors_are_not_cached(self):
+        cache = self.cache()
+        calls = []
+
+        def load():
+            calls.append(1)
+            raise OSError('temporaire')
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                cache.get_or_load('x', load)
+        self.assertEqual(len(calls), 2)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_load(self):
+        cache = TTLCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'valeur'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', load))) for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # Laisser les autres appels arriver pendant le chargement
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['valeur'] * 8)
+
+    def test_concurrent_callers_share_the_load_error(self):
+        cache = TTLCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls, errors = [], []
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            raise OSError('échec')
+
+        def call():
+            try:
+                cache.get_or_load('k', load)
+            except OSError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, ['échec'] * 4)
@@ -0,0 +1,61 @@
+import hashlib
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from converter.utils import scratch
+from converter.utils.upload_filter import PlanUploadHandler
+
+
+def upload_request(files, paths):
+    request = RequestFactory().post('/process', {'folder': files, 'paths': paths})
+    handler = PlanUploadHandler(request)
+    request.upload_handlers = [handler]
+    return request, handler
+
+
+@override_settings(PLAN_MEMORY_THRESHOLD=64 * 1024, PLAN_MEMORY_BUDGET=1024 * 1024)
+class PlanUploadHandlerTests(SimpleTestCase):
+    def setUp(self):
+        if not (scratch.PROC_FD_AVAILABLE and hasattr(scratch.os, 'memfd_create')):
+            self.skipTest('memfd indisponible')
+
+    def test_non_plans_are_discarded_and_small_plans_stay_in_memory(self):
+        content = b'%PDF-1.4 petit plan'
+        request, handler = upload_request(
+            [
+                SimpleUploadedFile('photo.jpg', b'\xff\xd8' * 1000),
+                SimpleUploadedFile('plan.pdf', content),
+                SimpleUploadedFile('notes.txt', b'texte')
+            ],
+            ['Parcelle A/photo.jpg', 'Parcelle A/plan.pdf', 'Parcelle A/notes.txt']
+        )
+
+        with mock.patch.object(scratch.tempfile, 'TemporaryFile', side_effect=AssertionError('écriture disque')):
+            files = request.FILES.getlist('folder')
+
+        self.assertEqual(len(files), 1)
+        self.assertEqual(request.upload_positions, [1])
+        self.assertEqual(handler.skipped, 2)
+        plan = files[0]
+        self.assertIsInstance(plan.file, scratch.MemoryScratchFile)
+        self.assertEqual(plan.file.reserved, len(content))
+        self.assertEqual(plan.sha256, hashlib.sha256(content).hexdigest())
+        pdf = plan.detach()
+        self.addCleanup(pdf.close)
+        self.assertEqual(pdf.read(), content)
+        # Le fichier remis au traitement n'est plus fermé avec la requête
+        request.close()
+        self.assertFalse(pdf.closed)
+
+    def test_large_plan_spills_to_disk_once(self):
+        content = bytes(range(256)) * 1024
+        request, _ = upload_request([SimpleUploadedFile('plan.pdf', content)], ['Parcelle B/plan.pdf'])
+
+        plan = request.FILES['folder']
+        self.addCleanup(plan.close)
+
+        self.assertNotIsInstance(plan.file, scratch.MemoryScratchFile)
+        self.assertEqual(plan.size, len(content))
+        self.assertEqual(plan.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(plan.read(), content)
+        self.assertEqual(scratch.memory_in_use(), 0)
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from django.urls import reverse
+from converter import views
+from converter.utils.chunked_upload import ChunkedUploads
+from converter.utils.job_queue import JobQueue
+
+CONTENT = b'%PDF-1.4 ' + os.urandom(250)
+CHUNK = 100
+
+
+class UploadPayloadTests(SimpleTestCase):
+    def test_non_object_json_is_rejected(self):
+        urls = [reverse('upload_create'), reverse('upload_complete', args=['a' * 32])]
+        for url in urls:
+            for body in ('[1, 2]', '"plan.pdf"', '42', 'null'):
+                with self.subTest(url=url, body=body):
+                    response = self.client.post(url, body, content_type='application/json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json()['error'], 'Requête invalide')
+
+
+class ChunkedUploadTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.base_dir = os.path.join(directory.name, 'chunked')
+        self.uploads = ChunkedUploads(base_dir=self.base_dir, max_size=10 * 1024, chunk_size=CHUNK)
+        queue = JobQueue(max_workers=1, state_dir=os.path.join(directory.name, 'jobs'))
+        self.addCleanup(queue.executor.shutdown)
+        self.processed = []
+
+        def process_plan(job, pdf, folder_name, content_hash):
+            with pdf:
+                self.processed.append((folder_name, content_hash, pdf.read()))
+            return []
+
+        for name, value in (('chunked_uploads', self.uploads), ('job_queue', queue), ('process_plan', process_plan)):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.queue = queue
+
+    def create(self, size=len(CONTENT)):
+        response = self.client.post(
+            reverse('upload_create'), json.dumps({'path': 'Parcelle A/plan.pdf', 'size': size}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def put(self, upload, offset, data):
+        return self.client.put(f"{upload['upload_url']}?offset={offset}", data, content_type='application/octet-stream')
+
+    def complete(self, upload, **payload):
+        return self.client.post(
+            reverse('upload_complete', args=[upload['id']]), json.dumps(payload), content_type='application/json'
+        )
+
+    def send_all(self, upload, start=0):
+        for offset in range(start, len(CONTENT), CHUNK):
+            response = self.put(upload, offset, CONTENT[offset:offset + CHUNK])
+            self.assertEqual(response.status_code, 200)
+
+    def test_complete_upload_is_processed(self):
+        upload = self.create()
+        self.send_all(upload)
+
+        response = self.complete(upload, sha256=hashlib.sha256(CONTENT).hexdigest())
+        self.queue.executor.submit(lambda: None).result(5)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['folder'], 'Parcelle A')
+        self.assertEqual(self.processed, [('Parcelle A', hashlib.sha256(CONTENT).hexdigest(), CONTENT)])
+        self.assertEqual(os.listdir(self.base_dir), [])
+
+    def test_duplicate_chunk_is_ignored(self):
+        upload = self.create()
+        self.put(upload, 0, CONTENT[:CHUNK])
+
+        response = self.put(upload, 0, CONTENT[:CHUNK])
+        overlapping = self.put(upload, 50, CONTENT[50:50 + CHUNK])
+
+        self.assertEqual(response.json()['offset'], CHUNK)
+        self.assertEqual(overlapping.json()['offset'], 50 + CHUNK)
+        self.send_all(upload, start=50 + CHUNK)
+        self.assertEqual(self.complete(upload).status_code, 202)
+        self.queue.executor.submit(lambda: None).result(5)
+        self.assertEqual(self.processed[0][2], CONTENT)
+
+    def test_out_of_order_chunk_is_refused_with_resume_offset(self):
+        upload = self.create()
+        self.put(upload, 0, CONTENT[:CHUNK])
+
+        response = self.put(upload, 2 * CHUNK, CONTENT[2 * CHUNK:3 * CHUNK])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], CHUNK)
+
+    def test_upload_resumes_after_partial_chunk(self):
+        upload = self.create()
+        self.put(upload, 0, CONTENT[:CHUNK])
+        # Connexion coupée au milieu du deuxième morceau : 30 octets seulement arrivent
+        received = self.uploads.write_chunk(upload['id'], CHUNK, io.BytesIO(CONTENT[CHUNK:CHUNK + 30]), CHUNK)
+        self.assertEqual(received, CHUNK + 30)
+
+        # Un autre worker (sans le hash en cours) reprend à la position annoncée
+        self.uploads = ChunkedUploads(base_dir=self.base_dir, max_size=10 * 1024, chunk_size=CHUNK)
+        with mock.patch.object(views, 'chunked_uploads', self.uploads):
+            state = self.client.get(upload['upload_url']).json()
+            self.assertEqual(state['offset'], CHUNK + 30)
+            self.send_all(upload, start=state['offset'])
+            response = self.complete(upload, sha256=hashlib.sha256(CONTENT).hexdigest())
+
+        self.assertEqual(response.status_code, 202)
+
+    def test_completion_before_all_bytes_is_refused(self):
+        upload = self.create()
+        self.put(upload, 0, CONTENT[:CHUNK])
+
+        response = self.complete(upload)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], CHUNK)
+        self.assertEqual(self.processed, [])
+
+    def test_checksum_mismatch_aborts_upload(self):
+        upload = self.create()
+        self.send_all(upload)
+
+        response = self.complete(upload, sha256='0' * 64)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.client.get(upload['upload_url']).status_code, 404)
+
+    def test_chunk_past_declared_size_is_refused(self):
+        upload = self.create(size=150)
+
+        response = self.put(upload, 100, CONTENT[:CHUNK])
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(self.client.get(upload['upload_url']).json()['offset'], 0)
+
+    def test_oversized_chunk_and_file_are_refused(self):
+        upload = self.create()
+
+        self.assertEqual(self.put(upload, 0, CONTENT[:CHUNK + 1]).status_code, 413)
+        response = self.client.post(
+            reverse('upload_create'), json.dumps({'path': 'Parcelle A/plan.pdf', 'size': 10 * 1024 + 1}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 413)
@@ -0,0 +1,37 @@
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from converter.utils import services, warmup
+
+
+class ReadinessTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(services._instances, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(WARMUP_ON_BOOT=True, STORAGE_BACKEND='local')
+    def test_not_ready_until_models_are_warmed_up(self):
+        response = self.client.get(reverse('ready'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['model_loaded'])
+        # La sonde ne déclenche aucun chargement
+        self.assertEqual(services._instances, {})
+
+    @override_settings(WARMUP_ON_BOOT=False, STORAGE_BACKEND='local')
+    def test_ready_from_storage_alone_without_warmup(self):
+        with mock.patch('converter.utils.storage.LocalStorage', return_value=object()):
+            response = self.client.get(reverse('ready'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['storage'], 'ok')
+        self.assertFalse(response.json()['model_loaded'])
+        self.assertNotIn('pdf_processor', services._instances)
+
+    @override_settings(WARMUP_ON_BOOT=False, STORAGE_BACKEND='inconnu')
+    def test_storage_error_keeps_worker_unready_without_warmup(self):
+        status = warmup.readiness()
+
+        self.assertFalse(status['ready'])
+        self.assertTrue(status['storage'].startswith('error'))
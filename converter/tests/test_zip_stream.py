@@ -0,0 +1,28 @@
+import io
+import os
+import zipfile
+from django.test import SimpleTestCase
+from converter.utils.zip_stream import iter_zip
+
+
+class IterZipTests(SimpleTestCase):
+    def test_entries_round_trip(self):
+        contents = {
+            'Plan/plan.pdf': os.urandom(200 * 1024),
+            'Plan/plan.csv': b'X,Y,page,confidence\n612345.1,712345.2,1,0.98\n' * 1000,
+            'Plan/vide.geojson': b''
+        }
+        entries = [(name, lambda data=data: io.BytesIO(data)) for name, data in contents.items()]
+
+        chunks = list(iter_zip(entries, chunk_size=16 * 1024))
+
+        self.assertGreater(len(chunks), 1)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), list(contents))
+            for name, data in contents.items():
+                self.assertEqual(archive.read(name), data)
+
+    def test_empty_archive_is_valid(self):
+        with zipfile.ZipFile(io.BytesIO(b''.join(iter_zip([])))) as archive:
+            self.assertEqual(archive.namelist(), [])
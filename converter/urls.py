@@ -4,8 +4,19 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('process', views.process_files, name='process_files'),
+    path('uploads', views.upload_create, name='upload_create'),
+    path('uploads/<str:upload_id>', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<str:upload_id>/complete', views.upload_complete, name='upload_complete'),
+    path('jobs/stream', views.job_events, name='job_events'),
+    path('jobs/<str:job_id>', views.job_status, name='job_status'),
+    path('cache/stats', views.cache_stats, name='cache_stats'),
+    path('ready', views.ready, name='ready'),
+    path('export', views.export_jobs, name='export_jobs'),
     path('view/<str:file_id>', views.view_file, name='view_file'),
     path('download/<str:file_id>', views.download_file, name='download_file'),
+    path('csv/<str:file_id>', views.view_csv, name='view_csv'),
+    path('api/coordinates/<str:file_id>', views.coordinates_api, name='coordinates_api'),
+    path('report/<str:csv_id>', views.generate_report, name='generate_report'),
     path('view-both/<str:pdf_id>/<str:csv_id>', views.view_both, name='view_both'),
     path('download-both/<str:pdf_id>/<str:csv_id>', views.download_both, name='download_both'),
 ]
@@ -0,0 +1,45 @@
+import math
+import numpy as np
+from collections import defaultdict
+
+
+def serializable_detections(results):
+    """Convertit des détections EasyOCR (types numpy) en listes JSON-sérialisables"""
+    return [
+        [[[float(x), float(y)] for x, y in box], str(text), float(confidence)]
+        for box, text, confidence in results
+    ]
+
+
+def pad_image(image, height, width):
+    """Complète une image avec du blanc (en bas et à droite) jusqu'à la taille demandée"""
+    if image.shape[:2] == (height, width):
+        return image
+    padded = np.full((height, width) + image.shape[2:], 255, dtype=image.dtype)
+    padded[:image.shape[0], :image.shape[1]] = image
+    return padded
+
+
+def readtext_batched(reader, images, batch_size=8, recognizer_batch_size=32, bucket=256):
+    """
+    OCR d'une liste d'images (pages ou zones) par lots.
+    La détection d'EasyOCR exige des images de même taille : les images sont regroupées par
+    taille arrondie au multiple de `bucket` et complétées de blanc, ce qui laisse les boîtes
+    dans le repère de l'image d'origine. La reconnaissance traite `recognizer_batch_size`
+    zones de texte à la fois. Retourne les détections de chaque image, dans l'ordre reçu.
+    """
+    results = [None] * len(images)
+    buckets = defaultdict(list)
+    for index, image in enumerate(images):
+        height, width = image.shape[:2]
+        key = (math.ceil(height / bucket) * bucket, math.ceil(width / bucket) * bucket)
+        buckets[key].append(index)
+
+    for (height, width), indexes in buckets.items():
+        for start in range(0, len(indexes), batch_size):
+            chunk = indexes[start:start + batch_size]
+            batch = [pad_image(images[i], height, width) for i in chunk]
+            detections = reader.readtext_batched(batch, batch_size=recognizer_batch_size)
+            for i, page_detections in zip(chunk, detections):
+                results[i] = page_detections
+    return results
@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import hashlib
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """Erreur d'un envoi par morceaux ; `status` est le code HTTP à renvoyer"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ChunkedUploads:
+    """
+    Envois reprenables par morceaux : création, écriture de morceaux à une position
+    donnée (idempotente), puis finalisation. Le fichier est assemblé directement dans
+    TEMP_UPLOAD_FOLDER, puis remis ouvert au traitement sans copie. Sa taille sur disque
+    fait foi pour la position reçue, ce qui permet à n'importe quel worker gunicorn de
+    recevoir n'importe quel morceau.
+    Le SHA-256 est calculé au fil des morceaux ; un worker qui n'a pas vu les morceaux
+    précédents rattrape son retard en ne relisant que les octets qui lui manquent.
+    """
+
+    def __init__(self, base_dir=None, max_size=None, chunk_size=None):
+        self.base_dir = base_dir or os.path.join(settings.TEMP_UPLOAD_FOLDER, 'chunked')
+        self.max_size = max_size or settings.UPLOAD_MAX_SIZE
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        os.makedirs(self.base_dir, exist_ok=True)
+        # ID d'envoi -> [position hachée, objet sha256] (propre à ce worker)
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+            raise UploadError('Envoi introuvable', status=404)
+        return os.path.join(self.base_dir, upload_id)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self._dir(upload_id), 'data.part')
+
+    def _meta(self, upload_id):
+        try:
+            with open(os.path.join(self._dir(upload_id), 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            raise UploadError('Envoi introuvable', status=404)
+
+    def create(self, filename, size, **metadata):
+        """Crée un envoi et retourne son état"""
+        if not 0 < size <= self.max_size:
+            raise UploadError(f"Taille invalide (maximum {self.max_size} octets)", status=413)
+        self.prune()
+        upload_id = uuid.uuid4().hex
+        directory = self._dir(upload_id)
+        os.makedirs(directory)
+        meta = {'id': upload_id, 'filename': filename, 'size': size, 'created_at': time.time(), **metadata}
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        open(self._part_path(upload_id), 'wb').close()
+        logger.info(f"Envoi {upload_id} créé ({filename}, {size} octets)")
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """État de l'envoi : métadonnées et nombre d'octets reçus (position de reprise)"""
+        meta = self._meta(upload_id)
+        meta['offset'] = os.path.getsize(self._part_path(upload_id))
+        meta['chunk_size'] = self.chunk_size
+        return meta
+
+    def write_chunk(self, upload_id, offset, stream, length):
+        """
+        Écrit un morceau de `length` octets lu depuis `stream`, qui commence à `offset`.
+        Un morceau déjà reçu (renvoi après coupure) est ignoré ; un morceau qui laisserait
+        un trou est refusé avec la position attendue. Retourne la nouvelle position.
+        """
+        meta = self._meta(upload_id)
+        if length > self.chunk_size:
+            raise UploadError(f"Morceau trop grand (maximum {self.chunk_size} octets)", status=413)
+        if offset < 0 or offset + length > meta['size']:
+            raise UploadError('Morceau hors du fichier annoncé', status=416)
+
+        with open(self._part_path(upload_id), 'r+b') as part:
+            # Verrou inter-processus : deux renvois du même morceau ne s'écrivent pas en même temps
+            fcntl.flock(part, fcntl.LOCK_EX)
+            try:
+                received = os.fstat(part.fileno()).st_size
+                if offset > received:
+                    raise UploadError('Morceau non contigu', status=409, offset=received)
+                # Ignorer la partie du morceau déjà reçue
+                skip = received - offset
+                part.seek(received)
+                remaining = length
+                while remaining > 0:
+                    data = stream.read(min(remaining, 64 * 1024))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    if skip >= len(data):
+                        skip -= len(data)
+                        continue
+                    part.write(data[skip:])
+                    skip = 0
+                if remaining:
+                    # Connexion coupée : les octets écrits restent valides, le client reprendra à la nouvelle position
+                    logger.warning(f"Morceau incomplet pour l'envoi {upload_id} ({remaining} octets manquants)")
+                part.flush()
+                received = part.tell()
+            finally:
+                fcntl.flock(part, fcntl.LOCK_UN)
+
+        self._advance_hash(upload_id, received)
+        return received
+
+    def _advance_hash(self, upload_id, upto):
+        """Met à jour le SHA-256 de ce worker jusqu'à la position `upto`"""
+        with self._lock:
+            state = self._hashes.setdefault(upload_id, [0, hashlib.sha256()])
+            if state[0] >= upto:
+                return state[1]
+            with open(self._part_path(upload_id), 'rb') as part:
+                part.seek(state[0])
+                remaining = upto - state[0]
+                while remaining > 0:
+                    data = part.read(min(remaining, 1024 * 1024))
+                    if not data:
+                        break
+                    state[1].update(data)
+                    remaining -= len(data)
+                    state[0] += len(data)
+            return state[1]
+
+    def finalize(self, upload_id, expected_sha256=None):
+        """
+        Vérifie que le fichier est complet et retourne (métadonnées, SHA-256 hexadécimal,
+        fichier assemblé ouvert en lecture). L'envoi est supprimé aussitôt : le fichier
+        ouvert reste lisible sans nom sur le disque, jusqu'à sa fermeture.
+        """
+        meta = self.status(upload_id)
+        if meta['offset'] != meta['size']:
+            raise UploadError('Envoi incomplet', status=409, offset=meta['offset'])
+        digest = self._advance_hash(upload_id, meta['size']).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != digest:
+            self.abort(upload_id)
+            raise UploadError('Empreinte SHA-256 différente : fichier corrompu', status=422)
+        assembled = open(self._part_path(upload_id), 'rb')
+        self.abort(upload_id)
+        logger.info(f"Envoi {upload_id} finalisé ({meta['size']} octets)")
+        return meta, digest, assembled
+
+    def abort(self, upload_id):
+        """Supprime un envoi et son état"""
+        with self._lock:
+            self._hashes.pop(upload_id, None)
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def prune(self, max_age=None):
+        """Supprime les envois abandonnés depuis plus de max_age secondes"""
+        max_age = max_age or settings.UPLOAD_SESSION_TTL
+        limit = time.time() - max_age
+        try:
+            for name in os.listdir(self.base_dir):
+                directory = os.path.join(self.base_dir, name)
+                part = os.path.join(directory, 'data.part')
+                last_write = os.path.getmtime(part) if os.path.exists(part) else os.path.getmtime(directory)
+                if last_write < limit:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    with self._lock:
+                        self._hashes.pop(name, None)
+        except OSError as e:
+            logger.warning(f"Nettoyage des envois impossible: {str(e)}")
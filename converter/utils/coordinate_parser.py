@@ -0,0 +1,163 @@
+import logging
+import numpy as np
+from .pdf_processor import COORDINATE_PATTERN, MIN_COORDINATE
+
+logger = logging.getLogger(__name__)
+
+
+def detections_to_arrays(pages):
+    """
+    Regroupe les détections de toutes les pages en tableaux NumPy.
+    `pages` : itérable de (numéro de page, [(boîte de 4 points, texte, confiance)]).
+    Retourne (page, boîtes (n, 4) en x0/y0/x1/y1, textes, confiances).
+    """
+    page_numbers, boxes, texts, confidences = [], [], [], []
+    for page_number, detections in pages:
+        for box, text, confidence in detections:
+            page_numbers.append(page_number)
+            boxes.append(box)
+            texts.append(text)
+            confidences.append(confidence)
+
+    if not texts:
+        return np.zeros(0, dtype=np.int32), np.zeros((0, 4)), [], np.zeros(0)
+
+    points = np.asarray(boxes, dtype=np.float64).reshape(len(texts), -1, 2)
+    bounds = np.column_stack([
+        points[:, :, 0].min(axis=1), points[:, :, 1].min(axis=1),
+        points[:, :, 0].max(axis=1), points[:, :, 1].max(axis=1)
+    ])
+    return np.asarray(page_numbers, dtype=np.int32), bounds, texts, np.asarray(confidences, dtype=np.float64)
+
+
+def tokenize(page_numbers, bounds, texts, confidences):
+    """
+    Extrait les nombres candidats de toutes les détections en un seul passage d'expression
+    régulière sur le texte concaténé. Chaque nombre reçoit sa propre boîte, interpolée
+    horizontalement dans celle de sa détection selon sa position dans le texte.
+    Retourne un dictionnaire de tableaux : page, value, x0, y0, x1, y1, confidence.
+    """
+    empty = {key: np.zeros(0) for key in ('value', 'x0', 'y0', 'x1', 'y1', 'confidence')}
+    empty['page'] = np.zeros(0, dtype=np.int32)
+    if not texts:
+        return empty
+
+    joined = '\n'.join(texts)
+    matches = [(m.start(), m.end(), m.group()) for m in COORDINATE_PATTERN.finditer(joined)]
+    if not matches:
+        return empty
+
+    starts, ends, raw = zip(*matches)
+    starts, ends = np.asarray(starts), np.asarray(ends)
+    values = np.asarray(raw).astype(np.float64)
+
+    # Détection d'origine de chaque nombre (début de chaque texte dans la chaîne concaténée)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    text_starts = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]])
+    owner = np.searchsorted(text_starts, starts, side='right') - 1
+
+    keep = values > MIN_COORDINATE
+    owner, starts, ends, values = owner[keep], starts[keep], ends[keep], values[keep]
+
+    text_length = np.maximum(lengths[owner], 1)
+    left, right = bounds[owner, 0], bounds[owner, 2]
+    width = right - left
+    local_start = starts - text_starts[owner]
+    local_end = ends - text_starts[owner]
+    return {
+        'page': page_numbers[owner],
+        'value': values,
+        'x0': left + width * local_start / text_length,
+        'y0': bounds[owner, 1],
+        'x1': left + width * local_end / text_length,
+        'y1': bounds[owner, 3],
+        'confidence': confidences[owner]
+    }
+
+
+def _cluster(page, positions, tolerance):
+    """
+    Regroupe des positions 1D par page : deux positions consécutives (triées) séparées
+    de plus de `tolerance` ouvrent un nouveau groupe. Retourne le rang du groupe dans sa page.
+    """
+    order = np.lexsort((positions, page))
+    sorted_page, sorted_positions = page[order], positions[order]
+    new_page = np.concatenate([[True], sorted_page[1:] != sorted_page[:-1]])
+    new_group = new_page | np.concatenate([[True], np.diff(sorted_positions) > tolerance])
+    group = np.cumsum(new_group) - 1
+    # Rang du groupe à l'intérieur de sa page
+    page_first_group = np.maximum.accumulate(np.where(new_page, group, 0))
+    ranks = np.empty_like(group)
+    ranks[order] = group - page_first_group
+    return ranks
+
+
+def parse_coordinates(pages, row_tolerance=0.6, column_tolerance=0.5):
+    """
+    Associe les nombres détectés en paires X/Y d'après la mise en page.
+    Les nombres sont regroupés en lignes (centre vertical, tolérance en fraction de la
+    hauteur médiane) et en colonnes (centre horizontal, tolérance en fraction de la
+    largeur médiane). Dans chaque ligne, un nombre X est associé au nombre de la colonne
+    immédiatement à sa droite (Y) : un nombre manquant ou en trop ne décale que sa
+    propre ligne. Une page sans aucune paire en tableau (liste sur une
+    seule colonne) est appariée dans l'ordre de lecture, comme auparavant.
+    Retourne un dictionnaire de tableaux : page, X, Y, confidence, x0, y0, x1, y1.
+    """
+    tokens = tokenize(*detections_to_arrays(pages))
+    count = len(tokens['value'])
+    columns = ('page', 'X', 'Y', 'confidence', 'x0', 'y0', 'x1', 'y1')
+    if count < 2:
+        return {key: np.zeros(0, dtype=np.int32 if key == 'page' else np.float64) for key in columns}
+
+    page = tokens['page']
+    heights = tokens['y1'] - tokens['y0']
+    widths = tokens['x1'] - tokens['x0']
+    row = _cluster(page, (tokens['y0'] + tokens['y1']) / 2, row_tolerance * max(np.median(heights), 1.0))
+    column = _cluster(page, (tokens['x0'] + tokens['x1']) / 2, column_tolerance * max(np.median(widths), 1.0))
+
+    # Ordre de lecture : page, ligne, colonne, puis position horizontale
+    order = np.lexsort((tokens['x0'], column, row, page))
+    page, row, column = page[order], row[order], column[order]
+    tokens = {key: values[order] for key, values in tokens.items()}
+
+    # Paires en tableau : X dans une colonne, Y juste à sa droite dans la même ligne.
+    # La parité des colonnes X est choisie par page selon la majorité des voisins, pour
+    # qu'une colonne parasite à gauche du tableau ne décale pas tous les rôles.
+    same_row = (page[:-1] == page[1:]) & (row[:-1] == row[1:])
+    adjacent = same_row & (column[1:] == column[:-1] + 1)
+    _, page_index = np.unique(page, return_inverse=True)
+    odd = (column[:-1] % 2 == 1)
+    odd_votes = np.bincount(page_index[:-1], weights=adjacent & odd, minlength=page_index.max() + 1)
+    even_votes = np.bincount(page_index[:-1], weights=adjacent & ~odd, minlength=page_index.max() + 1)
+    x_parity = (odd_votes > even_votes).astype(np.int64)
+    table_pair = adjacent & (column[:-1] % 2 == x_parity[page_index[:-1]])
+    first = np.flatnonzero(table_pair)
+
+    # Pages sans paire en tableau : appariement dans l'ordre de lecture
+    pages_with_pairs = np.unique(page[first])
+    fallback = ~np.isin(page, pages_with_pairs)
+    if fallback.any():
+        positions = np.flatnonzero(fallback)
+        fallback_pages = page[positions]
+        # Rang de chaque nombre dans sa page, pour apparier (0, 1), (2, 3)...
+        page_start = np.concatenate([[True], fallback_pages[1:] != fallback_pages[:-1]])
+        start_index = np.maximum.accumulate(np.where(page_start, np.arange(len(positions)), 0))
+        rank = np.arange(len(positions)) - start_index
+        candidates = positions[:-1][(rank[:-1] % 2 == 0) & (fallback_pages[:-1] == fallback_pages[1:])]
+        first = np.sort(np.concatenate([first, candidates]))
+
+    second = first + 1
+    result = {
+        'page': page[first],
+        'X': tokens['value'][first],
+        'Y': tokens['value'][second],
+        'confidence': np.minimum(tokens['confidence'][first], tokens['confidence'][second]),
+        'x0': np.minimum(tokens['x0'][first], tokens['x0'][second]),
+        'y0': np.minimum(tokens['y0'][first], tokens['y0'][second]),
+        'x1': np.maximum(tokens['x1'][first], tokens['x1'][second]),
+        'y1': np.maximum(tokens['y1'][first], tokens['y1'][second])
+    }
+    unpaired = count - 2 * len(first)
+    if unpaired:
+        logger.info(f"{unpaired} nombre(s) sans correspondant ignoré(s)")
+    return result
@@ -0,0 +1,159 @@
+import os
+import json
+import logging
+import importlib.util
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Colonnes et types des coordonnées extraites
+COLUMNS = (('X', np.float64), ('Y', np.float64), ('page', np.int32), ('confidence', np.float32))
+
+# Formats de sortie : extension et type MIME
+FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'geojson': ('.geojson', 'application/geo+json'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file')
+}
+
+# Nombre de lignes écrites à la fois par les sorties texte (CSV, GeoJSON)
+WRITE_BATCH_ROWS = 65536
+
+
+def arrow_available():
+    """Indique si les sorties Parquet/Arrow sont possibles (pyarrow est optionnel)"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def available_formats():
+    """Formats de sortie utilisables dans cet environnement"""
+    return [name for name in FORMATS if name in ('csv', 'geojson') or arrow_available()]
+
+
+class CoordinateTable:
+    """
+    Coordonnées extraites d'un plan, stockées par colonnes dans des tableaux NumPy typés
+    (X/Y en float64, page en int32, confiance en float32) : environ 24 octets par point,
+    au lieu d'un dictionnaire Python par point.
+    """
+
+    def __init__(self, X=(), Y=(), page=(), confidence=()):
+        values = {'X': X, 'Y': Y, 'page': page, 'confidence': confidence}
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.asarray(values[name], dtype=dtype))
+        if not len(self.X) == len(self.Y) == len(self.page) == len(self.confidence):
+            raise ValueError("Les colonnes des coordonnées n'ont pas la même longueur")
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Table depuis un dictionnaire de colonnes (résultat de l'analyse ou du cache)"""
+        return cls(**{name: columns[name] for name, _ in COLUMNS})
+
+    def to_columns(self):
+        """Colonnes en listes Python (sérialisables en JSON, pour le cache des résultats)"""
+        columns = {name: getattr(self, name).tolist() for name, _ in COLUMNS}
+        columns['confidence'] = np.round(self.confidence.astype(np.float64), 3).tolist()
+        return columns
+
+    def records(self):
+        """Lignes sous forme de dictionnaires {X, Y, page, confidence}"""
+        columns = self.to_columns()
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def __len__(self):
+        return len(self.X)
+
+    def __eq__(self, other):
+        if not isinstance(other, CoordinateTable):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, name), getattr(other, name)) for name, _ in COLUMNS)
+
+    def batches(self, size=WRITE_BATCH_ROWS):
+        """Parcourt les colonnes par tranches de `size` lignes, en listes Python"""
+        for start in range(0, len(self), size):
+            end = start + size
+            yield (
+                self.X[start:end].tolist(), self.Y[start:end].tolist(),
+                self.page[start:end].tolist(), np.round(self.confidence[start:end].astype(np.float64), 3).tolist()
+            )
+
+    def write(self, target, format='csv', crs=None):
+        """
+        Écrit la table au format demandé (voir FORMATS) dans `target` : un chemin, ou un
+        fichier binaire ouvert en écriture (tampon en mémoire par exemple).
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Format de sortie inconnu : {format}")
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, 'wb') as f:
+                return self.write(f, format, crs)
+
+        if format == 'csv':
+            write_csv(self, target)
+        elif format == 'geojson':
+            write_geojson(self, target, crs=crs)
+        elif format == 'parquet':
+            write_parquet(self, target)
+        else:
+            write_arrow(self, target)
+        logger.info(f"{len(self)} coordonnées écrites au format {format}")
+        return target
+
+
+def write_csv(table, f):
+    """
+    CSV au dialecte fixe : UTF-8, séparateur ',', point décimal, fins de ligne '\\n', en-tête
+    X,Y,page,confidence. Les valeurs sont écrites sans perte (plus courte représentation exacte).
+    """
+    f.write((','.join(name for name, _ in COLUMNS) + '\n').encode('utf-8'))
+    for X, Y, page, confidence in table.batches():
+        f.write(''.join(f"{x!r},{y!r},{p},{c!r}\n" for x, y, p, c in zip(X, Y, page, confidence)).encode('utf-8'))
+
+
+def write_geojson(table, f, crs=None):
+    """
+    FeatureCollection de points (propriétés page et confidence), écrite au fil des lignes.
+    Les coordonnées sont celles du plan : si `crs` est fourni (ex. 'EPSG:32630'), il est
+    déclaré dans le membre 'crs' reconnu par les logiciels SIG.
+    """
+    f.write(b'{"type":"FeatureCollection",')
+    if crs:
+        authority, _, code = crs.partition(':')
+        name = f"urn:ogc:def:crs:{authority}::{code}" if code else crs
+        member = {'type': 'name', 'properties': {'name': name}}
+        f.write(f'"crs":{json.dumps(member, separators=(",", ":"))},'.encode('utf-8'))
+    f.write(b'"features":[')
+    separator = '\n'
+    for X, Y, page, confidence in table.batches():
+        features = [
+            '{"type":"Feature","geometry":{"type":"Point","coordinates":[%r,%r]},'
+            '"properties":{"page":%d,"confidence":%r}}' % row
+            for row in zip(X, Y, page, confidence)
+        ]
+        f.write((separator + ',\n'.join(features)).encode('utf-8'))
+        separator = ',\n'
+    f.write(b'\n]}\n')
+
+
+def to_arrow(table):
+    """Table Arrow (colonnes typées, sans copie des tableaux NumPy)"""
+    import pyarrow as pa
+
+    return pa.table({name: getattr(table, name) for name, _ in COLUMNS})
+
+
+def write_parquet(table, f):
+    """Fichier Parquet (compression zstd)"""
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_arrow(table), f, compression='zstd')
+
+
+def write_arrow(table, f):
+    """Fichier Arrow IPC, lisible directement en mémoire projetée"""
+    import pyarrow as pa
+
+    arrow_table = to_arrow(table)
+    with pa.ipc.new_file(f, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
@@ -0,0 +1,106 @@
+import csv
+import math
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_value(text):
+    """Convertit une cellule en nombre si possible, sinon la retourne telle quelle"""
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class CsvIndex:
+    """
+    Index des positions (en octets) des lignes d'un fichier CSV.
+    Une page se lit en se positionnant directement sur sa première ligne, sans relire
+    les précédentes. Les ordres de tri sont calculés une fois par colonne puis conservés.
+    Le fichier (binaire, positionnable) reste ouvert tant que l'index est utilisé.
+    Les cellules contenant des retours à la ligne ne sont pas prises en charge.
+    """
+
+    def __init__(self, fileobj):
+        self.file = fileobj
+        self._lock = threading.Lock()
+        self._orders = {}
+
+        header = self.file.readline().decode('utf-8-sig').rstrip('\r\n')
+        self.delimiter = ';' if header.count(';') > header.count(',') else ','
+        self.columns = next(csv.reader([header], delimiter=self.delimiter), [])
+
+        self.offsets = array('q')
+        position = self.file.tell()
+        for line in iter(self.file.readline, b''):
+            if line.strip():
+                self.offsets.append(position)
+            position += len(line)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+    def close(self):
+        # Attendre la fin d'une lecture en cours avant de fermer le fichier
+        with self._lock:
+            self.file.close()
+
+    def _read_rows(self, row_numbers):
+        """
+        Lit les lignes demandées ; le fichier n'est repositionné que si la ligne ne commence
+        pas là où la précédente s'est arrêtée (les lignes vides intercalées forcent un saut)
+        """
+        lines = []
+        with self._lock:
+            position = None
+            for row in row_numbers:
+                if self.offsets[row] != position:
+                    self.file.seek(self.offsets[row])
+                    position = self.offsets[row]
+                line = self.file.readline()
+                position += len(line)
+                lines.append(line.decode('utf-8').rstrip('\r\n'))
+        return [[_parse_value(cell) for cell in cells] for cells in csv.reader(lines, delimiter=self.delimiter)]
+
+    def order(self, column, descending=False):
+        """Permutation des lignes triées selon une colonne (nombres avant texte)"""
+        key = (column, descending)
+        if key not in self._orders:
+            position = self.columns.index(column)
+            values = [row[position] if position < len(row) else '' for row in self._read_rows(range(len(self)))]
+
+            def sort_key(row):
+                value = values[row]
+                if isinstance(value, float) and not math.isnan(value):
+                    return (0, value, '')
+                return (1, 0.0, str(value))
+
+            self._orders[key] = array('q', sorted(range(len(self)), key=sort_key, reverse=descending))
+        return self._orders[key]
+
+    def page(self, page=1, page_size=100, sort=None, descending=False):
+        """Retourne une page de lignes (numérotées à partir de 1), éventuellement triée"""
+        page = max(page, 1)
+        start = (page - 1) * page_size
+        stop = min(start + page_size, len(self))
+        if sort:
+            row_numbers = self.order(sort, descending)[start:stop]
+        else:
+            row_numbers = range(start, stop)
+        return {
+            'columns': self.columns,
+            'total_rows': len(self),
+            'page': page,
+            'page_size': page_size,
+            'pages': math.ceil(len(self) / page_size) if page_size else 0,
+            'sort': sort,
+            'order': 'desc' if descending else 'asc',
+            'rows': self._read_rows(row_numbers) if start < stop else []
+        }
@@ -1,85 +1,193 @@
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from .ttl_cache import TTLCache
+from .storage import file_name
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Nombre maximal de requêtes par lot accepté par l'API Drive
+BATCH_LIMIT = 100
+# Statuts HTTP considérés comme transitoires
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+
+def _is_transient(error):
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return status is not None and int(status) in TRANSIENT_STATUSES
+
+def _is_not_found(error):
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return status is not None and int(status) == 404
+
 class GoogleDriveService:
     def __init__(self):
         self.SCOPES = ['https://www.googleapis.com/auth/drive.file']
         self.service = None
+        self.credentials = None
+        self.max_retries = settings.DRIVE_MAX_RETRIES
+        self.retry_backoff = settings.DRIVE_RETRY_BACKOFF
+        self.upload_concurrency = settings.DRIVE_UPLOAD_CONCURRENCY
+        self._local = threading.local()
+        self.metadata_cache = TTLCache(
+            max_size=settings.DRIVE_METADATA_CACHE_SIZE,
+            ttl=settings.DRIVE_METADATA_TTL,
+            negative_ttl=settings.DRIVE_METADATA_NEGATIVE_TTL,
+            is_missing=_is_not_found
+        )
         self.initialize_service()
 
     def initialize_service(self):
         """Initialise le service Google Drive"""
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
         try:
-            credentials = service_account.Credentials.from_service_account_file(
+            self.credentials = service_account.Credentials.from_service_account_file(
                 settings.GOOGLE_DRIVE_SETTINGS['service_account_file'],
                 scopes=self.SCOPES
             )
-            self.service = build('drive', 'v3', credentials=credentials)
+            self.service = build('drive', 'v3', credentials=self.credentials)
             logger.info("Service Google Drive initialisé avec succès")
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation du service Google Drive: {str(e)}")
             raise
 
-    def upload_file(self, file_path, mime_type):
-        """Upload un fichier sur Google Drive"""
+    def _http(self):
+        """Client HTTP propre au thread courant (httplib2 n'est pas thread-safe)"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def _execute(self, request):
+        """Exécute une requête ; les erreurs transitoires sont relancées avec un délai exponentiel"""
+        return request.execute(http=self._http(), num_retries=self.max_retries)
+
+    def _links(self, file_id):
+        return {
+            'file_id': file_id,
+            'download_link': f"https://drive.google.com/uc?export=download&id={file_id}",
+            'view_link': f"https://drive.google.com/file/d/{file_id}/view"
+        }
+
+    def _create_file(self, file, mime_type):
+        """
+        Crée le fichier sur Google Drive (upload reprenable) et retourne son ID.
+        `file` est un chemin, ou un objet fichier nommé envoyé directement depuis son tampon.
+        """
+        from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+
+        file_metadata = {'name': file_name(file)}
+        if isinstance(file, str):
+            media = MediaFileUpload(file, mimetype=mime_type, resumable=True)
+        else:
+            file.seek(0)
+            media = MediaIoBaseUpload(file, mimetype=mime_type, resumable=True)
+        file = self._execute(self.service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id'
+        ))
+        return file.get('id')
+
+    def _share_publicly(self, file_ids):
+        """
+        Rend les fichiers accessibles via un lien. Les permissions sont regroupées en
+        requêtes batch ; celles en échec transitoire sont relancées avec un délai exponentiel.
+        """
+        pending = list(file_ids)
+        for attempt in range(self.max_retries + 1):
+            failed = []
+
+            def callback(request_id, response, exception):
+                if exception is not None:
+                    failed.append((request_id, exception))
+
+            for start in range(0, len(pending), BATCH_LIMIT):
+                batch = self.service.new_batch_http_request(callback=callback)
+                for file_id in pending[start:start + BATCH_LIMIT]:
+                    batch.add(
+                        self.service.permissions().create(
+                            fileId=file_id,
+                            body={'type': 'anyone', 'role': 'reader'},
+                            fields='id'
+                        ),
+                        request_id=file_id
+                    )
+                batch.execute(http=self._http())
+
+            if not failed:
+                return
+            if attempt == self.max_retries or not all(_is_transient(e) for _, e in failed):
+                raise failed[0][1]
+            pending = [file_id for file_id, _ in failed]
+            delay = self.retry_backoff * 2 ** attempt
+            logger.warning(f"{len(pending)} permissions à relancer dans {delay:.1f} s")
+            time.sleep(delay)
+
+    def upload_files(self, files):
+        """
+        Upload plusieurs fichiers sur Google Drive en parallèle puis les partage en un seul lot.
+        files est une liste de tuples (chemin ou objet fichier nommé, type MIME) ;
+        les résultats sont dans le même ordre.
+        """
         try:
-            file_metadata = {'name': os.path.basename(file_path)}
-            media = MediaFileUpload(file_path, mimetype=mime_type, resumable=True)
-            
-            # Créer le fichier sur Google Drive
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id'
-            ).execute()
-            
-            # Définir les permissions pour rendre le fichier accessible via un lien
-            self.service.permissions().create(
-                fileId=file.get('id'),
-                body={'type': 'anyone', 'role': 'reader'},
-                fields='id'
-            ).execute()
-            
-            # Obtenir les liens de partage
-            file_id = file.get('id')
-            download_link = f"https://drive.google.com/uc?export=download&id={file_id}"
-            view_link = f"https://drive.google.com/file/d/{file_id}/view"
-            
-            logger.info(f"Fichier uploadé avec succès. ID: {file_id}")
-            return {
-                'file_id': file_id,
-                'download_link': download_link,
-                'view_link': view_link
-            }
-        
+            workers = max(min(self.upload_concurrency, len(files)), 1)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hiconvert-drive') as executor:
+                file_ids = list(executor.map(lambda item: self._create_file(*item), files))
+
+            # Définir les permissions pour rendre les fichiers accessibles via un lien
+            self._share_publicly(file_ids)
+
+            for (file, mime_type), file_id in zip(files, file_ids):
+                # Les consultations qui suivent l'upload n'ont pas besoin d'interroger Drive
+                self.metadata_cache.set(file_id, {
+                    'id': file_id,
+                    'name': file_name(file),
+                    'mimeType': mime_type
+                })
+                logger.info(f"Fichier uploadé avec succès. ID: {file_id} ({file_name(file)})")
+            return [self._links(file_id) for file_id in file_ids]
+
         except Exception as e:
-            logger.error(f"Erreur lors de l'upload du fichier {file_path}: {str(e)}")
+            logger.error(f"Erreur lors de l'upload des fichiers {[file_name(file) for file, _ in files]}: {str(e)}")
             raise
 
+    def upload_file(self, file_path, mime_type):
+        """Upload un fichier sur Google Drive"""
+        return self.upload_files([(file_path, mime_type)])[0]
+
     def delete_file(self, file_id):
         """Supprime un fichier de Google Drive"""
         try:
-            self.service.files().delete(fileId=file_id).execute()
+            self._execute(self.service.files().delete(fileId=file_id))
+            self.metadata_cache.invalidate(file_id)
             logger.info(f"Fichier {file_id} supprimé avec succès")
             return True
         except Exception as e:
             logger.error(f"Erreur lors de la suppression du fichier {file_id}: {str(e)}")
             return False
 
+    def get_cached_metadata(self, file_id):
+        """
+        Métadonnées minimales d'un fichier (id, nom, type MIME) via le cache : les fichiers
+        uploadés par ce worker y sont déjà, et les ID inexistants y sont mémorisés un temps.
+        """
+        return self.metadata_cache.get_or_load(file_id, lambda: self._execute(self.service.files().get(
+            fileId=file_id,
+            fields='id, name, mimeType'
+        )))
+
     def get_file_url(self, file_id):
         """Obtient l'URL de visualisation d'un fichier"""
         try:
             # Vérifier que le fichier existe et est accessible
-            file = self.service.files().get(
-                fileId=file_id,
-                fields='id, mimeType'
-            ).execute()
+            self.get_cached_metadata(file_id)
             
             # Retourner l'URL de prévisualisation Google Drive
             return f"https://drive.google.com/file/d/{file_id}/preview"
@@ -92,10 +200,7 @@ class GoogleDriveService:
         """Obtient l'URL de téléchargement d'un fichier"""
         try:
             # Vérifier que le fichier existe et est accessible
-            file = self.service.files().get(
-                fileId=file_id,
-                fields='id'
-            ).execute()
+            self.get_cached_metadata(file_id)
             
             # Retourner l'URL de téléchargement direct
             return f"https://drive.google.com/uc?export=download&id={file_id}"
@@ -104,13 +209,36 @@ class GoogleDriveService:
             logger.error(f"Erreur lors de la récupération de l'URL de téléchargement du fichier {file_id}: {str(e)}")
             raise
 
+    def open_file(self, file_id, chunk_size=8 * 1024 * 1024):
+        """
+        Télécharge le contenu d'un fichier par morceaux dans un fichier temporaire
+        (en mémoire tant qu'il est petit) et le retourne ouvert en lecture, au début.
+        """
+        import tempfile
+        from googleapiclient.http import MediaIoBaseDownload
+
+        buffer = tempfile.SpooledTemporaryFile(max_size=chunk_size)
+        try:
+            request = self.service.files().get_media(fileId=file_id)
+            request.http = self._http()
+            downloader = MediaIoBaseDownload(buffer, request, chunksize=chunk_size)
+            done = False
+            while not done:
+                _, done = downloader.next_chunk(num_retries=self.max_retries)
+            buffer.seek(0)
+            return buffer
+        except Exception as e:
+            buffer.close()
+            logger.error(f"Erreur lors du téléchargement du fichier {file_id}: {str(e)}")
+            raise
+
     def get_file_metadata(self, file_id):
         """Obtient les métadonnées d'un fichier"""
         try:
-            return self.service.files().get(
+            return self._execute(self.service.files().get(
                 fileId=file_id,
                 fields='id, name, mimeType, webViewLink, webContentLink'
-            ).execute()
+            ))
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des métadonnées du fichier {file_id}: {str(e)}")
             raise
@@ -118,11 +246,11 @@ class GoogleDriveService:
     def list_files(self, page_size=10, page_token=None):
         """Liste les fichiers du Drive"""
         try:
-            results = self.service.files().list(
+            results = self._execute(self.service.files().list(
                 pageSize=page_size,
                 fields="nextPageToken, files(id, name, mimeType, webViewLink, webContentLink)",
                 pageToken=page_token
-            ).execute()
+            ))
             
             return {
                 'files': results.get('files', []),
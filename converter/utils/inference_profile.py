@@ -0,0 +1,91 @@
+import os
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Profils d'inférence CPU :
+# - quantize : modèles de détection et de reconnaissance quantifiés dynamiquement en int8
+# - dpi_scale : facteur appliqué à OCR_DPI pour la rastérisation (moins de pixels à analyser)
+# EasyOCR quantifie déjà ses modèles par défaut (quantize=True) : 'balanced' (profil par
+# défaut) reproduit donc exactement le comportement antérieur aux profils. 'accurate' est le
+# seul mode nouveau (modèles float32, sans quantification) ; 'fast' est 'balanced' avec une
+# DPI réduite. Comparaison latence/concordance : docs/benchmark_ocr.md.
+PROFILES = {
+    'accurate': {'quantize': False, 'dpi_scale': 1.0},
+    'balanced': {'quantize': True, 'dpi_scale': 1.0},
+    'fast': {'quantize': True, 'dpi_scale': 0.75}
+}
+
+
+def get_profile(name=None):
+    """Réglages du profil demandé (OCR_PROFILE par défaut) et DPI de rastérisation résultante"""
+    name = (name or settings.OCR_PROFILE).lower()
+    if name not in PROFILES:
+        raise ValueError(f"Profil d'inférence inconnu : {name} (choix : {', '.join(PROFILES)})")
+    profile = dict(PROFILES[name], name=name)
+    profile['dpi'] = max(int(round(settings.OCR_DPI * profile['dpi_scale'])), 72)
+    return profile
+
+
+def available_cpus():
+    """
+    Cœurs réellement utilisables par ce processus : affinité CPU, bornée par le quota
+    cgroup v2 du conteneur (cpu.max) quand il existe.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            cpus = min(cpus, max(int(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def thread_budget(ocr_workers=None, web_workers=None, cpus=None):
+    """
+    Threads d'inférence par processus, pour que toutes les inférences simultanées de
+    l'instance tiennent dans les cœurs disponibles. Chaque worker gunicorn exécute
+    JOB_WORKERS traitements à la fois (ou alimente ocr_workers processus OCR), et torch
+    crée une équipe de threads par inférence en cours.
+    """
+    cpus = cpus or available_cpus()
+    ocr_workers = ocr_workers or settings.OCR_WORKERS
+    web_workers = web_workers or settings.WEB_WORKERS
+    concurrent = web_workers * (ocr_workers if ocr_workers > 1 else settings.JOB_WORKERS)
+    return max(cpus // max(concurrent, 1), 1)
+
+
+def configure_threads(threads):
+    """Fixe le nombre de threads de torch et d'OpenCV dans ce processus"""
+    # Pris en compte par OpenMP s'il n'est pas encore initialisé (processus du pool OCR)
+    os.environ.setdefault('OMP_NUM_THREADS', str(threads))
+    import torch
+    import cv2
+
+    torch.set_num_threads(threads)
+    try:
+        # Le parallélisme entre opérateurs n'apporte rien à l'OCR et ne peut être fixé qu'une fois
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    cv2.setNumThreads(threads)
+    logger.info(f"Inférence limitée à {threads} thread(s) par processus")
+
+
+def create_reader(languages, quantize=True, threads=None):
+    """easyocr.Reader sur CPU, avec le budget de threads et la quantification demandés"""
+    if threads:
+        configure_threads(threads)
+    import easyocr
+
+    logger.info(
+        f"Chargement des modèles EasyOCR ({', '.join(languages)}, "
+        f"{'int8' if quantize else 'float32'})"
+    )
+    return easyocr.Reader(languages, gpu=False, quantize=quantize)
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Les ID de traitement sont des uuid4 hexadécimaux
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Avancement global (en %) associé à chaque étape du traitement
+STAGE_PROGRESS = {
+    'queued': 0,
+    'rasterize': 5,
+    'ocr': 10,
+    'parse': 85,
+    'upload': 90,
+    'report': 50,
+    'done': 100,
+}
+
+
+class JobHandle:
+    """Poignée passée aux fonctions de traitement pour publier leur avancement"""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+
+    def report(self, stage, current=None, total=None):
+        """Publie l'étape courante (ex: 'ocr', page 3 sur 12)"""
+        progress = STAGE_PROGRESS.get(stage, 0)
+        if stage == 'ocr' and total:
+            # L'OCR occupe la plage 10% -> 85%, répartie sur les pages
+            span = STAGE_PROGRESS['parse'] - STAGE_PROGRESS['ocr']
+            progress = STAGE_PROGRESS['ocr'] + int(span * (current or 0) / total)
+        self.queue.update(
+            self.job_id,
+            stage=stage,
+            current=current,
+            total=total,
+            progress=progress
+        )
+
+
+class JobQueue:
+    """
+    File d'attente locale des traitements.
+    Les traitements tournent dans un pool de threads du worker ; leur état est
+    écrit sur disque pour que n'importe quel worker gunicorn puisse le lire.
+    Chaque état porte le PID du worker propriétaire, qui le rafraîchit régulièrement
+    (updated_at) tant que le traitement est en attente ou en cours : un traitement dont
+    le worker a disparu (recyclage, crash) ou qui n'est plus rafraîchi passe en erreur
+    à la lecture, au lieu de rester 'running' indéfiniment.
+    Les traitements d'une nature listée dans `dedicated` ({nature: threads}) ont leur propre
+    pool : un rapport rapide n'attend pas derrière de longs OCR.
+    """
+
+    def __init__(self, max_workers=None, state_dir=None, dedicated=None):
+        self.max_workers = max_workers or settings.JOB_WORKERS
+        self.state_dir = state_dir or settings.JOB_STATE_FOLDER
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='hiconvert-job'
+        )
+        self.executors = {
+            kind: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'hiconvert-{kind}')
+            for kind, workers in (dedicated or {}).items()
+        }
+        self._lock = threading.Lock()
+        self.heartbeat_interval = settings.JOB_HEARTBEAT_INTERVAL
+        self.stale_after = settings.JOB_STALE_AFTER
+        # Traitements en attente ou en cours dans ce processus
+        self._active = set()
+        self._heartbeat = None
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _write(self, job_id, state):
+        # Écriture atomique : les lecteurs ne voient jamais un fichier partiel
+        path = self._state_path(job_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, job_id):
+        try:
+            with open(self._state_path(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, job_id):
+        """Retourne l'état d'un traitement, ou None s'il n'existe pas"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        state = self._read(job_id)
+        if state is None:
+            return None
+        if state.get('status') in ('queued', 'running') and self._is_orphaned(state):
+            logger.warning(f"Traitement {job_id} abandonné par le worker {state.get('owner_pid')}, marqué en erreur")
+            state = self.update(
+                job_id, status='error', error='Traitement interrompu : le worker qui le portait s\'est arrêté'
+            )
+        return state
+
+    def _is_orphaned(self, state):
+        """Indique si le worker propriétaire d'un traitement actif a disparu ou ne le rafraîchit plus"""
+        pid = state.get('owner_pid')
+        if pid == os.getpid():
+            return state['id'] not in self._active
+        if pid is not None:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return time.time() - state.get('updated_at', 0) > self.stale_after
+
+    def _start_heartbeat(self):
+        """Démarre (une fois par processus) le thread qui rafraîchit les traitements actifs"""
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+
+        def beat():
+            while True:
+                time.sleep(self.heartbeat_interval)
+                with self._lock:
+                    active = list(self._active)
+                for job_id in active:
+                    try:
+                        self.update(job_id)
+                    except OSError as e:
+                        logger.warning(f"Rafraîchissement du traitement {job_id} impossible: {str(e)}")
+
+        self._heartbeat = threading.Thread(target=beat, name='hiconvert-job-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def update(self, job_id, **fields):
+        """Met à jour l'état d'un traitement"""
+        with self._lock:
+            state = self._read(job_id) or {'id': job_id}
+            state.update(fields)
+            state['updated_at'] = time.time()
+            self._write(job_id, state)
+            return state
+
+    def submit(self, func, *args, kind=None, **kwargs):
+        """
+        Planifie func(job, *args, **kwargs) et retourne immédiatement l'identifiant du traitement.
+        La valeur retournée par func devient le champ 'results' de l'état ; kind (ex. 'plan',
+        'report') est enregistré dans l'état pour distinguer la nature des résultats.
+        """
+        self.prune()
+        self._start_heartbeat()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._active.add(job_id)
+        self.update(
+            job_id,
+            kind=kind,
+            status='queued',
+            stage='queued',
+            progress=0,
+            current=None,
+            total=None,
+            results=None,
+            error=None,
+            owner_pid=os.getpid(),
+            created_at=time.time()
+        )
+        self.executors.get(kind, self.executor).submit(self._run, job_id, func, args, kwargs)
+        logger.info(f"Traitement {job_id} mis en file d'attente")
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        self.update(job_id, status='running')
+        try:
+            results = func(JobHandle(self, job_id), *args, **kwargs)
+            self.update(job_id, status='done', stage='done', progress=100, results=results)
+            logger.info(f"Traitement {job_id} terminé avec succès")
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement {job_id}: {str(e)}")
+            self.update(job_id, status='error', error=str(e))
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def watch(self, job_ids, interval=0.5, timeout=None):
+        """
+        Suit plusieurs traitements et génère leur état à chaque changement d'étape ou
+        d'avancement, jusqu'à ce qu'ils soient tous terminés (ou en erreur) ou que
+        timeout secondes se soient écoulées. Un traitement inconnu est généré une fois
+        sous la forme {'id': ..., 'status': 'unknown'}.
+        """
+        remaining = list(dict.fromkeys(job_ids))
+        seen = {}
+        deadline = time.monotonic() + timeout if timeout else None
+        while remaining:
+            for job_id in list(remaining):
+                state = self.get(job_id) or {'id': job_id, 'status': 'unknown'}
+                fingerprint = (state['status'], state.get('stage'), state.get('progress'), state.get('current'))
+                if seen.get(job_id) != fingerprint:
+                    seen[job_id] = fingerprint
+                    yield state
+                if state['status'] in ('done', 'error', 'unknown'):
+                    remaining.remove(job_id)
+            if not remaining or (deadline is not None and time.monotonic() >= deadline):
+                break
+            time.sleep(interval)
+
+    def prune(self, max_age=None):
+        """Supprime les états des traitements plus anciens que max_age secondes"""
+        max_age = max_age or settings.JOB_RETENTION
+        limit = time.time() - max_age
+        try:
+            for name in os.listdir(self.state_dir):
+                path = os.path.join(self.state_dir, name)
+                if name.endswith('.json') and os.path.getmtime(path) < limit:
+                    os.remove(path)
+        except OSError as e:
+            logger.warning(f"Nettoyage des états de traitement impossible: {str(e)}")
@@ -0,0 +1,212 @@
+import os
+import json
+import queue
+import socket
+import struct
+import logging
+import threading
+import socketserver
+import numpy as np
+from .batch_ocr import readtext_batched, serializable_detections
+
+logger = logging.getLogger(__name__)
+
+# En-tête de trame : longueur de l'en-tête JSON puis longueur des données binaires
+_FRAME = struct.Struct('!II')
+
+
+class OCRServerError(Exception):
+    """Erreur renvoyée par le serveur OCR ou de communication avec lui"""
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise OCRServerError("Connexion au serveur OCR interrompue")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, header, payload=b''):
+    """Envoie une trame : en-tête JSON suivi de données binaires"""
+    header_bytes = json.dumps(header).encode('utf-8')
+    sock.sendall(_FRAME.pack(len(header_bytes), len(payload)) + header_bytes)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    """Reçoit une trame ; retourne (en-tête, données binaires)"""
+    header_size, payload_size = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_size).decode('utf-8'))
+    payload = _recv_exact(sock, payload_size) if payload_size else b''
+    return header, payload
+
+
+def encode_images(images):
+    """Sérialise des images uint8 : (formes, données concaténées)"""
+    images = [np.ascontiguousarray(image, dtype=np.uint8) for image in images]
+    return [list(image.shape) for image in images], b''.join(image.tobytes() for image in images)
+
+
+def decode_images(shapes, payload):
+    images = []
+    offset = 0
+    for shape in shapes:
+        size = int(np.prod(shape))
+        images.append(np.frombuffer(payload, dtype=np.uint8, count=size, offset=offset).reshape(shape))
+        offset += size
+    return images
+
+
+class RemoteReader:
+    """
+    Client du serveur OCR, utilisable à la place d'un easyocr.Reader
+    (readtext et readtext_batched). Une connexion est ouverte par appel.
+    """
+
+    def __init__(self, socket_path, timeout=300):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _request(self, op, images=()):
+        shapes, payload = encode_images(images)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                send_message(sock, {'op': op, 'shapes': shapes}, payload)
+                header, _ = recv_message(sock)
+            except OSError as e:
+                raise OCRServerError(f"Serveur OCR injoignable ({self.socket_path}): {str(e)}")
+        if not header.get('ok'):
+            raise OCRServerError(header.get('error', 'Erreur inconnue du serveur OCR'))
+        return header
+
+    def readtext(self, image, **options):
+        return self.readtext_batched([image])[0]
+
+    def readtext_batched(self, images, **options):
+        return self._request('readtext', images)['results']
+
+    def ping(self):
+        """Retourne l'état du serveur (langues, nombre de requêtes traitées)"""
+        return self._request('ping')
+
+
+class _Request:
+    def __init__(self, images):
+        self.images = images
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            header, payload = recv_message(self.request)
+            if header.get('op') == 'ping':
+                send_message(self.request, {'ok': True, **self.server.ocr.status()})
+                return
+            images = decode_images(header.get('shapes', []), payload)
+            pending = self.server.ocr.submit(images)
+            pending.done.wait()
+            if pending.error is not None:
+                send_message(self.request, {'ok': False, 'error': pending.error})
+            else:
+                send_message(self.request, {'ok': True, 'results': pending.results})
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement d'une requête OCR: {str(e)}")
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class OCRServer:
+    """
+    Serveur d'inférence OCR local sur socket Unix.
+    Un seul easyocr.Reader est chargé ; les requêtes de tous les workers web arrivant
+    dans la même fenêtre de max_wait secondes sont regroupées en un lot d'au plus
+    max_batch images.
+    """
+
+    def __init__(self, socket_path, languages=None, max_batch=8, max_wait=0.01, recognizer_batch_size=1,
+                 quantize=True, threads=None):
+        self.socket_path = socket_path
+        self.languages = languages or ['fr']
+        self.quantize = quantize
+        self.threads = threads
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.recognizer_batch_size = recognizer_batch_size
+        self.reader = None
+        self.requests_served = 0
+        self._queue = queue.Queue()
+
+    def status(self):
+        return {'languages': self.languages, 'requests_served': self.requests_served}
+
+    def submit(self, images):
+        pending = _Request(images)
+        self._queue.put(pending)
+        return pending
+
+    def _next_batch(self):
+        """Attend une requête puis regroupe celles qui arrivent dans la fenêtre max_wait"""
+        batch = [self._queue.get()]
+        count = len(batch[0].images)
+        while count < self.max_batch:
+            try:
+                pending = self._queue.get(timeout=self.max_wait)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            count += len(pending.images)
+        return batch
+
+    def _inference_loop(self):
+        while True:
+            batch = self._next_batch()
+            images = [image for pending in batch for image in pending.images]
+            try:
+                detections = readtext_batched(
+                    self.reader, images,
+                    batch_size=self.max_batch,
+                    recognizer_batch_size=self.recognizer_batch_size
+                )
+                offset = 0
+                for pending in batch:
+                    count = len(pending.images)
+                    pending.results = [serializable_detections(d) for d in detections[offset:offset + count]]
+                    offset += count
+            except Exception as e:
+                logger.error(f"Erreur lors de l'inférence OCR: {str(e)}")
+                for pending in batch:
+                    pending.error = str(e)
+            self.requests_served += len(batch)
+            for pending in batch:
+                pending.done.set()
+
+    def serve_forever(self):
+        from .inference_profile import create_reader
+        self.reader = create_reader(self.languages, self.quantize, self.threads)
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = _UnixServer(self.socket_path, _Handler)
+        server.ocr = self
+        os.chmod(self.socket_path, 0o660)
+
+        threading.Thread(target=self._inference_loop, name='hiconvert-ocr-inference', daemon=True).start()
+        logger.info(f"Serveur OCR à l'écoute sur {self.socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
@@ -1,20 +1,356 @@
 import os
-import cv2
-import numpy as np
-import pandas as pd
-from pdf2image import convert_from_path
-import easyocr
+from .rasterizer import iter_pages, count_pages
+from . import text_layer
+from .result_cache import ResultCache
+from .inference_profile import get_profile, thread_budget, create_reader
 import logging
-import torch
 import re
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Nombres d'au moins 5 chiffres, éventuellement décimaux
+COORDINATE_PATTERN = re.compile(r'\b\d{5,}(?:\.\d+)?\b')
+MIN_COORDINATE = 100000
+
+# À incrémenter à chaque changement du pipeline qui modifie les résultats (invalide les caches)
+PIPELINE_VERSION = '3'
+
+def extract_numbers(text):
+    """Extrait d'un texte les nombres pouvant être des coordonnées"""
+    numbers = [float(num.replace(',', '.')) for num in COORDINATE_PATTERN.findall(text)]
+    return [num for num in numbers if num > MIN_COORDINATE]
+
+def page_fingerprint(image):
+    """Empreinte SHA-256 d'une page rastérisée (mode, taille et pixels)"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode('utf-8'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+# Reader EasyOCR propre à chaque processus du pool OCR
+_worker_reader = None
+
+def _init_ocr_worker(languages, quantize, threads):
+    """Charge les modèles EasyOCR une seule fois par processus du pool"""
+    global _worker_reader
+    _worker_reader = create_reader(languages, quantize, threads)
+
+def _ocr_page_worker(image_np, use_roi, batch_size, preprocessing=None):
+    """OCR d'une page dans un processus du pool (prétraitement compris)"""
+    from .roi import ocr_regions
+    from .preprocess import preprocess_page
+    image_np = preprocess_page(image_np, **(preprocessing or {}))
+    return ocr_regions(_worker_reader, image_np, use_roi, batch_size=batch_size)
+
 class PDFProcessor:
-    def __init__(self):
-        self.reader = easyocr.Reader(['fr'])
+    def __init__(self, languages=None, ocr_workers=None, profile=None):
+        self.languages = languages or ['fr']
+        self.ocr_server_socket = settings.OCR_SERVER_SOCKET
+        # Avec le serveur OCR partagé, le modèle vit hors du worker : pas de pool local
+        self.ocr_workers = 1 if self.ocr_server_socket else (ocr_workers or settings.OCR_WORKERS)
+        # Profil d'inférence CPU : quantification int8, DPI, et threads par processus
+        self.profile = get_profile(profile)
+        self.quantize = self.profile['quantize']
+        self.dpi = self.profile['dpi']
+        self.threads = settings.OCR_THREADS or thread_budget(self.ocr_workers)
+        self.use_text_layer = settings.USE_TEXT_LAYER
+        self.text_layer_min_pairs = max(settings.TEXT_LAYER_MIN_PAIRS, 1)
+        self.use_roi = settings.OCR_ROI
+        self.ocr_batch_size = settings.OCR_BATCH_SIZE
+        self.recognizer_batch_size = settings.OCR_RECOGNIZER_BATCH_SIZE
+        # Prétraitement des pages : rendu en niveaux de gris, redressement, binarisation
+        self.grayscale = settings.OCR_GRAYSCALE
+        self.deskew = settings.OCR_DESKEW
+        self.binarize = settings.OCR_BINARIZE
+        self.page_cache = ResultCache('pages', PIPELINE_VERSION) if settings.USE_PAGE_CACHE else None
+        # Les modèles ne sont chargés qu'au premier OCR (ou lors du préchauffage)
+        self.warmed_up = False
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            with self._reader_lock:
+                if self._reader is None:
+                    self._reader = self._create_reader()
+        return self._reader
+
+    def _create_reader(self):
+        """
+        Reader utilisé dans ce processus : client du serveur OCR partagé s'il est configuré,
+        sinon un easyocr.Reader local. En mode pool, chaque processus porte son propre Reader.
+        """
+        if self.ocr_server_socket:
+            from .ocr_server import RemoteReader
+            logger.info(f"OCR délégué au serveur {self.ocr_server_socket}")
+            return RemoteReader(self.ocr_server_socket)
+        if self.ocr_workers > 1:
+            return None
+        return create_reader(self.languages, self.quantize, self.threads)
+
+    def is_model_loaded(self):
+        """Indique si les modèles OCR sont chargés (Reader local, pool ou client du serveur)"""
+        return self.warmed_up or self._reader is not None
+
+    def warm_up(self):
+        """
+        Charge les modèles et exécute une inférence OCR synthétique, pour que le premier
+        vrai traitement tourne à la latence nominale. Retourne la durée en secondes.
+        """
+        import cv2
+        import numpy as np
+
+        start = time.perf_counter()
+        image = np.full((64, 320, 3), 255, dtype=np.uint8)
+        cv2.putText(image, '512345.12', (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+
+        if self.ocr_workers > 1:
+            # Une tâche par processus pour démarrer et préchauffer tout le pool
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_ocr_page_worker, image, False, self.recognizer_batch_size)
+                for _ in range(self.ocr_workers)
+            ]
+            for future in futures:
+                future.result()
+        else:
+            self.reader.readtext(image)
+
+        self.warmed_up = True
+        elapsed = time.perf_counter() - start
+        logger.info(f"Modèles OCR préchauffés en {elapsed:.2f} s")
+        return elapsed
+
+    def extraction_settings(self):
+        """Réglages qui influencent le résultat de l'extraction (utilisés comme clé de cache)"""
+        return {
+            'languages': self.languages,
+            'dpi': self.dpi,
+            'pattern': COORDINATE_PATTERN.pattern,
+            'min_coordinate': MIN_COORDINATE,
+            'text_layer': self.use_text_layer,
+            'text_layer_min_pairs': self.text_layer_min_pairs,
+            'roi': self.use_roi,
+            'quantize': self.quantize,
+            'grayscale': self.grayscale,
+            **self.preprocessing()
+        }
+
+    def ocr_settings(self):
+        """Réglages qui influencent les détections OCR d'une page (utilisés comme clé du cache par page)"""
+        return {'languages': self.languages, 'roi': self.use_roi, 'quantize': self.quantize, **self.preprocessing()}
+
+    def preprocessing(self):
+        """Options de preprocess_page appliquées à chaque page avant l'OCR"""
+        return {'binarize_page': self.binarize, 'deskew_page': self.deskew}
+
+    def _get_pool(self):
+        """Crée à la demande le pool de processus OCR, partagé entre les traitements"""
+        with self._pool_lock:
+            if self._pool is None:
+                # 'spawn' évite de dupliquer l'état de torch et des threads du worker web
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.ocr_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_ocr_worker,
+                    initargs=(self.languages, self.quantize, self.threads)
+                )
+                logger.info(f"Pool OCR démarré avec {self.ocr_workers} processus de {self.threads} thread(s)")
+            return self._pool
+
+    def _ocr_pages(self, pages):
+        """
+        Lance l'OCR sur un flux de tuples (numéro de page, image PIL).
+        Génère (numéro de page, résultats EasyOCR, statistiques de zone) dans l'ordre des pages.
+        En mode pool, au plus deux pages par processus sont en vol pour borner la mémoire ;
+        sans pool, les pages sont regroupées par lots si ocr_batch_size > 1.
+        """
+        from .roi import ocr_regions
+        from .preprocess import page_array, preprocess_page
+
+        # Un seul tableau uint8 par page (niveaux de gris sans conversion), prétraité au besoin
+        options = self.preprocessing()
+        to_np = lambda image: preprocess_page(page_array(image), **options)
+
+        if self.ocr_workers <= 1 and self.ocr_batch_size > 1:
+            yield from self._ocr_pages_batched(pages, to_np)
+            return
+
+        if self.ocr_workers <= 1:
+            for page_number, image in pages:
+                yield (page_number, *ocr_regions(
+                    self.reader, to_np(image), self.use_roi, batch_size=self.recognizer_batch_size
+                ))
+            return
+
+        pool = self._get_pool()
+        in_flight = deque()
+        max_in_flight = self.ocr_workers * 2
+        for page_number, image in pages:
+            # Le prétraitement se fait dans le processus du pool, en parallèle
+            future = pool.submit(
+                _ocr_page_worker, page_array(image), self.use_roi, self.recognizer_batch_size, options
+            )
+            in_flight.append((page_number, future))
+            while len(in_flight) >= max_in_flight:
+                # Les pages sont traitées en parallèle mais relues dans l'ordre
+                number, future = in_flight.popleft()
+                yield (number, *future.result())
+        while in_flight:
+            number, future = in_flight.popleft()
+            yield (number, *future.result())
+
+    def _ocr_pages_batched(self, pages, to_np):
+        """
+        Variante de _ocr_pages qui regroupe les pages par fenêtres de ocr_batch_size et
+        envoie toutes leurs zones (pages entières ou tableaux) à EasyOCR en un seul lot.
+        """
+        window = []
+        for page in pages:
+            window.append(page)
+            if len(window) >= self.ocr_batch_size:
+                yield from self._ocr_window(window, to_np)
+                window = []
+        if window:
+            yield from self._ocr_window(window, to_np)
+
+    def _ocr_window(self, window, to_np):
+        """OCR groupé d'une fenêtre de pages ; génère les résultats page par page"""
+        from .roi import split_regions, offset_detections
+        from .batch_ocr import readtext_batched
+
+        items = []
+        page_stats = []
+        for index, (_, image) in enumerate(window):
+            crops, stats = split_regions(to_np(image), self.use_roi)
+            items.extend((index, x, y, crop) for x, y, crop in crops)
+            page_stats.append(stats)
+
+        detections = readtext_batched(
+            self.reader,
+            [crop for _, _, _, crop in items],
+            batch_size=self.ocr_batch_size,
+            recognizer_batch_size=self.recognizer_batch_size
+        )
+        page_results = [[] for _ in window]
+        for (index, x, y, _), crop_detections in zip(items, detections):
+            page_results[index].extend(offset_detections(crop_detections, x, y))
+
+        for index, (page_number, _) in enumerate(window):
+            yield page_number, page_results[index], page_stats[index]
+
+    def close(self):
+        """Arrête le pool OCR s'il a été démarré"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
         
+    def _text_layer_pairs(self, page_number, detections):
+        """Nombre de paires X/Y que l'analyse des coordonnées tire de la couche texte d'une page"""
+        if not any(extract_numbers(text) for _, text, _ in detections):
+            return 0
+        from .coordinate_parser import parse_coordinates
+        return len(parse_coordinates([(page_number, detections)])['X'])
+
+    def _detect_pages(self, pdf_path, progress_callback=None, telemetry=None):
+        """
+        Retourne les détections de chaque page, dans l'ordre : [(numéro de page, détections)].
+        Les pages dont la couche texte donne des paires de coordonnées sont lues directement ;
+        les autres sont rastérisées, et seules celles dont l'empreinte est absente du cache
+        par page passent à l'OCR (un plan révisé ne repasse que ses feuilles modifiées).
+        Si telemetry est une liste, elle reçoit une entrée par page (source, durée, détections).
+        """
+        def record(page_number, source, duration, detections, roi_stats=None):
+            if telemetry is not None:
+                entry = {
+                    'page': page_number,
+                    'source': source,
+                    'duration': round(duration, 3),
+                    'detections': len(detections)
+                }
+                if roi_stats:
+                    entry.update(roi_stats)
+                telemetry.append(entry)
+
+        total = count_pages(pdf_path)
+        detected = {}
+
+        if self.use_text_layer and text_layer.is_available():
+            try:
+                start = time.perf_counter()
+                for page_number, detections in text_layer.iter_text_pages(pdf_path, dpi=self.dpi):
+                    # La couche texte n'est retenue que si elle donne des paires de coordonnées :
+                    # un cartouche vectoriel (n° de titre foncier...) sur un plan scanné part à l'OCR
+                    if self._text_layer_pairs(page_number, detections) >= self.text_layer_min_pairs:
+                        detected[page_number] = detections
+                        record(page_number, 'text', time.perf_counter() - start, detections)
+                    elif any(extract_numbers(text) for _, text, _ in detections):
+                        logger.info(f"Page {page_number}: couche texte sans paire de coordonnées, page envoyée à l'OCR")
+                    start = time.perf_counter()
+            except Exception as e:
+                logger.warning(f"Lecture de la couche texte impossible, OCR complet: {str(e)}")
+                detected = {}
+                if telemetry is not None:
+                    telemetry.clear()
+
+        ocr_pages = [n for n in range(1, total + 1) if n not in detected]
+        logger.info(f"{total} pages : {total - len(ocr_pages)} via la couche texte, {len(ocr_pages)} à rastériser")
+
+        if ocr_pages:
+            from .batch_ocr import serializable_detections
+
+            if progress_callback:
+                progress_callback('rasterize', None, None)
+            state = {'done': 0, 'start': time.perf_counter()}
+            page_keys = {}
+
+            def advance(page_number, source, detections, roi_stats=None):
+                detected[page_number] = detections
+                record(page_number, source, time.perf_counter() - state['start'], detections, roi_stats)
+                state['done'] += 1
+                state['start'] = time.perf_counter()
+                if progress_callback:
+                    progress_callback('ocr', state['done'], len(ocr_pages))
+
+            def uncached(pages):
+                # Les pages inchangées depuis un précédent traitement réutilisent leurs détections
+                for page_number, image in pages:
+                    if self.page_cache is not None:
+                        key = self.page_cache.make_key(page_fingerprint(image), **self.ocr_settings())
+                        cached = self.page_cache.get(key)
+                        if cached is not None:
+                            advance(page_number, 'page-cache', cached)
+                            continue
+                        page_keys[page_number] = key
+                    yield page_number, image
+
+            pages = iter_pages(pdf_path, dpi=self.dpi, pages=ocr_pages, grayscale=self.grayscale)
+            for page_number, results, roi_stats in self._ocr_pages(uncached(pages)):
+                results = serializable_detections(results)
+                if page_number in page_keys:
+                    self.page_cache.set(page_keys[page_number], results)
+                if roi_stats['regions']:
+                    logger.info(
+                        f"Page {page_number}: {roi_stats['regions']} zones de tableau, "
+                        f"{roi_stats['area_saved']} pixels non analysés"
+                    )
+                advance(page_number, 'ocr', results, roi_stats)
+
+        if telemetry is not None:
+            telemetry.sort(key=lambda entry: entry['page'])
+        return sorted(detected.items())
+
     def process_pdf(self, pdf_path):
         """
         Traite un fichier PDF et extrait le texte en utilisant EasyOCR.
@@ -22,44 +358,16 @@ class PDFProcessor:
         """
         try:
             logger.info(f"Début du traitement du fichier PDF: {pdf_path}")
-            
-            # Convertir le PDF en images
-            images = convert_from_path(pdf_path)
-            logger.info(f"PDF converti en {len(images)} images")
-            
-            numbers = []
-            
-            for i, image in enumerate(images):
-                # Convertir l'image PIL en tableau numpy
-                image_np = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                
-                # Extraire le texte
-                results = self.reader.readtext(image_np)
-                logger.info(f"Page {i+1}: {len(results)} zones de texte détectées")
-                
-                # Extraction des nombres
-                for result in results:
-                    text = result[1]
-                    extracted_numbers = re.findall(r'\b\d{5,}(?:\.\d+)?\b', text)
-                    valid_numbers = [float(num.replace(',', '.')) for num in extracted_numbers if float(num.replace(',', '.')) > 100000]
-                    numbers.extend(valid_numbers)
-                    for num in valid_numbers:
-                        logger.info(f"Nombre extrait: {num} (confiance: {result[2]:.2f}, page: {i+1})")
-            
-            # Diviser la liste en coordonnées X et Y
-            X = numbers[::2]  # Nombres pairs (0, 2, 4, ...)
-            Y = numbers[1::2]  # Nombres impairs (1, 3, 5, ...)
-            
-            # Créer un DataFrame avec les coordonnées
-            df = pd.DataFrame(list(zip(X, Y)), columns=['X', 'Y'])
+
+            coordinates = self.extract_coordinates(pdf_path)
             
             # Générer le nom du fichier CSV (même nom que le PDF)
             csv_path = os.path.splitext(pdf_path)[0] + '.csv'
             
-            # Sauvegarder en CSV
-            df.to_csv(csv_path, index=False, sep=';')
+            # Sauvegarder en CSV (même dialecte que les traitements de l'application)
+            coordinates.write(csv_path, 'csv')
             
-            logger.info(f"Fichier CSV créé : {csv_path} avec {len(X)} paires de coordonnées")
+            logger.info(f"Fichier CSV créé : {csv_path} avec {len(coordinates)} paires de coordonnées")
             
             return csv_path
             
@@ -67,39 +375,24 @@ class PDFProcessor:
             logger.error(f"Erreur lors du traitement du PDF: {str(e)}")
             raise
 
-    def extract_coordinates(self, pdf_path):
+    def extract_coordinates(self, pdf_path, progress_callback=None, telemetry=None):
         """
         Extrait les coordonnées X et Y d'un fichier PDF.
-        Retourne une liste de dictionnaires avec les coordonnées.
+        Retourne une CoordinateTable (colonnes X, Y, page, confidence).
+        progress_callback(stage, current, total) est appelé à chaque étape si fourni.
+        telemetry, si c'est une liste, reçoit le chemin suivi par chaque page ('text' ou 'ocr').
         """
         try:
             logger.info(f"Extraction des coordonnées depuis: {pdf_path}")
             
-            # Utiliser la méthode process_pdf existante
-            numbers = []
-            images = convert_from_path(pdf_path)
-            
-            for i, image in enumerate(images):
-                # Convertir l'image PIL en tableau numpy
-                image_np = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                
-                # Extraire le texte
-                results = self.reader.readtext(image_np)
-                
-                # Extraction des nombres
-                for result in results:
-                    text = result[1]
-                    extracted_numbers = re.findall(r'\b\d{5,}(?:\.\d+)?\b', text)
-                    valid_numbers = [float(num.replace(',', '.')) for num in extracted_numbers if float(num.replace(',', '.')) > 100000]
-                    numbers.extend(valid_numbers)
-            
-            # Diviser la liste en coordonnées X et Y
-            coordinates = []
-            for i in range(0, len(numbers)-1, 2):
-                coordinates.append({
-                    'X': numbers[i],
-                    'Y': numbers[i+1]
-                })
+            pages = self._detect_pages(pdf_path, progress_callback, telemetry)
+
+            # Appariement X/Y d'après la mise en page, sur toutes les détections à la fois
+            if progress_callback:
+                progress_callback('parse', None, None)
+            from .coordinate_parser import parse_coordinates
+            from .coordinate_table import CoordinateTable
+            coordinates = CoordinateTable.from_columns(parse_coordinates(pages))
             
             logger.info(f"Extraction terminée. {len(coordinates)} paires de coordonnées trouvées.")
             return coordinates
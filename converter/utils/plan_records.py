@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import logging
+import threading
+from django.conf import settings
+from .job_queue import JOB_ID_PATTERN
+
+logger = logging.getLogger(__name__)
+
+
+def plan_files(results):
+    """
+    Fichiers stockés de chaque plan d'un traitement terminé (champ 'results' de process_plan) :
+    [{'name': nom du plan, 'files': [{'name', 'file_id'}]}], PDF puis CSV puis autres formats.
+    """
+    plans = []
+    for result in results:
+        stored = [result['pdf'], result['csv']] + list(result.get('outputs', {}).values())
+        plans.append({
+            'name': os.path.splitext(result['pdf']['name'])[0],
+            'files': [{'name': item['name'], 'file_id': item['file_id']} for item in stored]
+        })
+    return plans
+
+
+class PlanRecords:
+    """
+    Registre persistant des fichiers produits par chaque traitement de plan (un fichier
+    JSON par traitement dans PLAN_RECORD_FOLDER). Contrairement aux états de la file
+    d'attente, supprimés après JOB_RETENTION, ces enregistrements ne sont pas purgés :
+    un export peut regrouper des traitements anciens tant que leurs fichiers sont stockés.
+    """
+
+    def __init__(self, record_dir=None):
+        self.record_dir = record_dir or settings.PLAN_RECORD_FOLDER
+        os.makedirs(self.record_dir, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.record_dir, f"{job_id}.json")
+
+    def save(self, job_id, results):
+        """Enregistre les fichiers stockés d'un traitement terminé"""
+        record = {'id': job_id, 'created_at': time.time(), 'plans': plan_files(results)}
+        path = self._path(job_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+        return record
+
+    def get(self, job_id):
+        """Retourne l'enregistrement d'un traitement, ou None s'il n'existe pas"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
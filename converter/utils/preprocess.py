@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+
+# En deçà de cet angle (degrés), la page n'est pas redressée
+MIN_SKEW = 0.1
+
+
+def page_array(image):
+    """
+    Tableau uint8 contigu d'une page rastérisée, sans conversion de couleur pour une page
+    en niveaux de gris (une seule copie depuis l'image PIL). Une page couleur est
+    convertie en BGR, l'ordre attendu par OpenCV et EasyOCR.
+    """
+    array = np.asarray(image, dtype=np.uint8)
+    if array.ndim == 3:
+        return cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+    return np.ascontiguousarray(array)
+
+
+def binarize(gray, block_size=31, offset=15):
+    """
+    Seuillage adaptatif gaussien : chaque pixel est comparé à la moyenne de son voisinage,
+    ce qui garde les chiffres fins lisibles malgré un fond de scan inégal (jaunissement, ombres).
+    """
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, offset)
+
+
+def estimate_skew(gray, max_angle=5.0, width=1000):
+    """
+    Angle d'inclinaison de la page (degrés) par profil de projection : sur une copie
+    réduite, l'angle retenu est celui qui rend les lignes d'encre les plus nettes
+    (variance maximale des sommes par ligne). Recherche grossière puis fine.
+    """
+    scale = min(width / gray.shape[1], 1.0)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    ink = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1].astype(np.float32)
+    height, small_width = ink.shape
+    center = (small_width / 2, height / 2)
+
+    def score(angle):
+        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(ink, matrix, (small_width, height), flags=cv2.INTER_NEAREST)
+        return float(np.var(rotated.sum(axis=1)))
+
+    coarse = max(np.arange(-max_angle, max_angle + 0.25, 0.5), key=score)
+    return float(max(np.arange(coarse - 0.4, coarse + 0.45, 0.1), key=score))
+
+
+def deskew(gray, angle):
+    """Redresse la page de `angle` degrés (bords complétés en blanc)"""
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(
+        gray, matrix, (width, height), flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT, borderValue=255
+    )
+
+
+def preprocess_page(page, binarize_page=False, deskew_page=False):
+    """
+    Prépare une page (tableau issu de page_array) pour l'OCR : redressement puis
+    binarisation, tous deux facultatifs. Sans l'un ni l'autre, la page est rendue telle
+    quelle ; sinon le résultat est une image en niveaux de gris, contiguë.
+    """
+    if not (binarize_page or deskew_page):
+        return page
+    gray = page if page.ndim == 2 else cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+    if deskew_page:
+        angle = estimate_skew(gray)
+        if abs(angle) >= MIN_SKEW:
+            gray = deskew(gray, angle)
+    if binarize_page:
+        gray = binarize(gray)
+    return np.ascontiguousarray(gray)
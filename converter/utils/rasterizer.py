@@ -0,0 +1,85 @@
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Marqueur de fin du flux de pages
+_END = object()
+
+
+def count_pages(pdf_path):
+    """Retourne le nombre de pages d'un PDF sans le rastériser"""
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(pdf_path)['Pages'])
+
+
+def iter_pages(pdf_path, dpi=200, window=1, prefetch=1, pages=None, grayscale=False):
+    """
+    Rastérise un PDF page par page et génère des tuples (numéro de page, image PIL).
+    Seules `window` pages sont rendues à la fois ; la fenêtre suivante est rendue en
+    tâche de fond pendant que l'appelant traite la courante (au plus `prefetch` fenêtres
+    d'avance), ce qui borne la mémoire quel que soit le nombre de pages.
+    `pages` permet de restreindre le rendu à une liste de numéros de page (1-indexés).
+    Avec `grayscale`, poppler rend directement des pages en niveaux de gris (mode 'L') :
+    trois fois moins de données à produire, copier et convertir.
+    """
+    if pages is None:
+        pages = range(1, count_pages(pdf_path) + 1)
+    pages = list(pages)
+
+    buffer = queue.Queue(maxsize=max(prefetch, 1))
+    stop = threading.Event()
+
+    def put(item):
+        # Abandonne si le consommateur a arrêté de lire
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def render():
+        from pdf2image import convert_from_path
+
+        try:
+            for start in range(0, len(pages), window):
+                batch = pages[start:start + window]
+                for first, last in batch_ranges(batch):
+                    images = convert_from_path(
+                        pdf_path, dpi=dpi, first_page=first, last_page=last, grayscale=grayscale
+                    )
+                    if not put(list(zip(range(first, last + 1), images))):
+                        return
+        except Exception as e:
+            put(e)
+            return
+        put(_END)
+
+    thread = threading.Thread(target=render, name='hiconvert-rasterizer', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                logger.error(f"Erreur lors de la rastérisation de {pdf_path}: {str(item)}")
+                raise item
+            for page in item:
+                yield page
+    finally:
+        stop.set()
+
+
+def batch_ranges(page_numbers):
+    """Regroupe une liste de numéros de page en plages contiguës (first, last)"""
+    ranges = []
+    for number in page_numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], number)
+        else:
+            ranges.append((number, number))
+    return ranges
@@ -0,0 +1,112 @@
+import logging
+from io import BytesIO
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand le contenu du rapport change (invalide les rapports en cache)
+REPORT_VERSION = '1'
+
+
+def read_coordinates(fileobj):
+    """Lit un CSV de coordonnées (séparateur ',' ou ';' détecté sur l'en-tête)"""
+    import pandas as pd
+
+    header = fileobj.readline()
+    fileobj.seek(0)
+    separator = ';' if header.count(b';') > header.count(b',') else ','
+    return pd.read_csv(fileobj, sep=separator)
+
+
+def render_distribution(df, max_scatter_points=5000, gridsize=120, dpi=150):
+    """
+    Graphique de la distribution des points (PNG en mémoire), rendu avec le moteur Agg.
+    La figure est créée sans pyplot (aucun état global), ce qui permet des rendus
+    simultanés dans les threads des traitements.
+    Au-delà de max_scatter_points, un histogramme hexagonal (densité, échelle log)
+    remplace le nuage de points : le temps de rendu ne dépend plus du nombre de points.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    if len(df) > max_scatter_points:
+        hexbin = axes.hexbin(df['X'], df['Y'], gridsize=gridsize, bins='log', mincnt=1, cmap='viridis')
+        figure.colorbar(hexbin, ax=axes, label='Nombre de points')
+        axes.set_title(f'Densité des points ({len(df)} points)')
+    else:
+        axes.scatter(df['X'], df['Y'], s=6, alpha=0.6, linewidths=0)
+        axes.set_title('Distribution des Points')
+    axes.set_xlabel('Coordonnée X')
+    axes.set_ylabel('Coordonnée Y')
+
+    buffer = BytesIO()
+    figure.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    buffer.seek(0)
+    return buffer
+
+
+def build_report(fileobj, source_name, output_path, max_scatter_points=5000):
+    """Génère le rapport PDF (statistiques et distribution des points) d'un CSV de coordonnées"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+
+    df = read_coordinates(fileobj)
+
+    doc = SimpleDocTemplate(output_path, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Titre
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30
+    )
+    story.append(Paragraph("Rapport d'Analyse des Coordonnées", title_style))
+    story.append(Spacer(1, 12))
+
+    # Informations générales
+    story.append(Paragraph(f"Date du rapport : {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    story.append(Paragraph(f"Fichier source : {source_name}", styles['Normal']))
+    story.append(Paragraph(f"Nombre total de points : {len(df)}", styles['Normal']))
+    story.append(Spacer(1, 12))
+
+    # Statistiques descriptives
+    story.append(Paragraph("Statistiques Descriptives", styles['Heading2']))
+    stats_df = df[['X', 'Y']].describe()
+    stats_table = Table([
+        ['Statistique', 'Coordonnée X', 'Coordonnée Y']
+    ] + [
+        [index, f"{row['X']:.2f}", f"{row['Y']:.2f}"]
+        for index, row in stats_df.iterrows()
+    ])
+    stats_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    story.append(stats_table)
+    story.append(Spacer(1, 20))
+
+    # Graphique de distribution
+    if len(df):
+        story.append(Paragraph("Distribution des Points", styles['Heading2']))
+        story.append(Image(render_distribution(df, max_scatter_points), width=6*inch, height=4*inch))
+
+    doc.build(story)
+    logger.info(f"Rapport généré pour {source_name} ({len(df)} points)")
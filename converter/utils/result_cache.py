@@ -0,0 +1,181 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Cache disque des résultats d'extraction, borné en taille avec éviction LRU.
+    Chaque entrée est un fichier JSON ; sa date de modification sert de date du dernier accès.
+    Les compteurs de succès/échecs sont propres au processus courant.
+    """
+
+    suffix = '.json'
+
+    def __init__(self, namespace, version, cache_dir=None, max_bytes=None):
+        self.version = version
+        self.cache_dir = os.path.join(cache_dir or settings.CACHE_FOLDER, namespace)
+        self.max_bytes = max_bytes or settings.RESULT_CACHE_MAX_BYTES
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, content_hash, **options):
+        """Construit la clé d'une entrée à partir du hash du contenu et des réglages d'extraction"""
+        payload = json.dumps(
+            {'content': content_hash, 'version': self.version, 'options': options},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}{self.suffix}")
+
+    def get(self, key):
+        """Retourne la valeur associée à la clé, ou None"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('version') != self.version:
+                raise ValueError('version obsolète')
+            # Marquer l'entrée comme récemment utilisée
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry['value']
+
+    def set(self, key, value):
+        """Enregistre une valeur puis applique la limite de taille"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'value': value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Écriture du cache impossible: {str(e)}")
+            return
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except FileNotFoundError:
+                continue
+
+    def invalidate(self, all_versions=False):
+        """
+        Supprime les entrées produites par une autre version du pipeline
+        (ou toutes les entrées si all_versions est vrai). Retourne le nombre d'entrées supprimées.
+        """
+        removed = 0
+        for _, _, name in self._entries():
+            path = os.path.join(self.cache_dir, name)
+            if not all_versions:
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        if json.load(f).get('version') == self.version:
+                            continue
+                except (FileNotFoundError, ValueError):
+                    pass
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+        logger.info(f"{removed} entrées supprimées du cache {self.cache_dir}")
+        return removed
+
+    def stats(self):
+        """Statistiques du cache"""
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'version': self.version,
+            'pid': os.getpid()
+        }
+
+
+class FileCache(ResultCache):
+    """
+    Cache disque de fichiers produits (rapports PDF...), avec la même éviction LRU.
+    La version fait partie de la clé : les entrées d'une ancienne version ne sont plus
+    demandées et finissent évincées.
+    """
+
+    def __init__(self, namespace, version, suffix, cache_dir=None, max_bytes=None):
+        self.suffix = suffix
+        super().__init__(namespace, version, cache_dir=cache_dir, max_bytes=max_bytes)
+
+    def get_path(self, key):
+        """Retourne le chemin du fichier associé à la clé, ou None"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key, source_path):
+        """Copie un fichier produit dans le cache puis applique la limite de taille"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Écriture du cache impossible: {str(e)}")
+            return None
+        self.evict()
+        return path
+
+    def get(self, key):
+        return self.get_path(key)
+
+    def set(self, key, value):
+        self.put(key, value)
+
+    def invalidate(self, all_versions=False):
+        """Sans all_versions, rien n'est supprimé : la version n'est connue que par la clé"""
+        if not all_versions:
+            return 0
+        return super().invalidate(all_versions=True)
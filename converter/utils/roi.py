@@ -0,0 +1,108 @@
+import cv2
+import numpy as np
+
+# Une ligne plus longue que cette fraction de la page est un cadre de feuille, pas un tableau
+FRAME_RATIO = 0.9
+
+
+def _line_mask(binary, kernel_size):
+    """Ne conserve que les traits rectilignes de la taille du noyau (horizontal ou vertical)"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, kernel_size)
+    return cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+
+
+def _drop_frame_lines(mask, horizontal):
+    """Efface les traits qui traversent presque toute la page (cadre du plan)"""
+    height, width = mask.shape
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if (horizontal and w > FRAME_RATIO * width) or (not horizontal and h > FRAME_RATIO * height):
+            cv2.drawContours(mask, [contour], -1, 0, thickness=cv2.FILLED)
+    return mask
+
+
+def _merge_boxes(boxes):
+    """Fusionne les rectangles (x, y, w, h) qui se chevauchent"""
+    merged = []
+    for box in sorted(boxes):
+        x, y, w, h = box
+        for i, (mx, my, mw, mh) in enumerate(merged):
+            if x <= mx + mw and mx <= x + w and y <= my + mh and my <= y + h:
+                nx, ny = min(x, mx), min(y, my)
+                merged[i] = (nx, ny, max(x + w, mx + mw) - nx, max(y + h, my + mh) - ny)
+                break
+        else:
+            merged.append(box)
+    return merged if len(merged) == len(boxes) else _merge_boxes(merged)
+
+
+def find_table_regions(image, min_area_ratio=0.002, min_intersections=4, padding=10):
+    """
+    Détecte les zones de tableaux (grilles de traits horizontaux et verticaux) d'une page.
+    Retourne une liste de rectangles (x, y, largeur, hauteur) en pixels, éventuellement vide.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape
+
+    # Traits sombres sur fond clair -> masque binaire des traits
+    binary = cv2.adaptiveThreshold(
+        cv2.bitwise_not(gray), 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 15, -2
+    )
+    horizontal = _drop_frame_lines(_line_mask(binary, (max(width // 40, 10), 1)), True)
+    vertical = _drop_frame_lines(_line_mask(binary, (1, max(height // 40, 10))), False)
+
+    grid = cv2.dilate(cv2.add(horizontal, vertical), np.ones((3, 3), np.uint8))
+    intersections = cv2.bitwise_and(horizontal, vertical)
+    contours, _ = cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w * h < min_area_ratio * width * height:
+            continue
+        # Un tableau a des croisements de traits ; un simple trait ou un cadre de légende non
+        count, _ = cv2.connectedComponents(intersections[y:y + h, x:x + w])
+        if count - 1 < min_intersections:
+            continue
+        x0, y0 = max(x - padding, 0), max(y - padding, 0)
+        x1, y1 = min(x + w + padding, width), min(y + h + padding, height)
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+
+    return _merge_boxes(boxes)
+
+
+def split_regions(image, use_roi=True):
+    """
+    Découpe une page en zones à analyser : ses tableaux, ou la page entière à défaut.
+    Retourne ([(x, y, image de la zone)], statistiques de la zone analysée).
+    """
+    height, width = image.shape[:2]
+    page_area = width * height
+    regions = find_table_regions(image) if use_roi else []
+
+    if not regions:
+        return [(0, 0, image)], {'regions': 0, 'ocr_area': page_area, 'area_saved': 0}
+
+    crops = [(x, y, np.ascontiguousarray(image[y:y + h, x:x + w])) for x, y, w, h in regions]
+    ocr_area = sum(w * h for _, _, w, h in regions)
+    return crops, {'regions': len(regions), 'ocr_area': ocr_area, 'area_saved': page_area - ocr_area}
+
+
+def offset_detections(detections, x, y):
+    """Ramène des détections faites sur une zone dans le repère de la page"""
+    if not x and not y:
+        return list(detections)
+    return [([[px + x, py + y] for px, py in box], text, confidence) for box, text, confidence in detections]
+
+
+def ocr_regions(reader, image, use_roi=True, **readtext_options):
+    """
+    OCR d'une page limité à ses zones de tableaux, avec repli sur la page entière.
+    Retourne (détections en coordonnées de la page, statistiques de la zone analysée).
+    """
+    crops, stats = split_regions(image, use_roi)
+    results = []
+    for x, y, crop in crops:
+        results.extend(offset_detections(reader.readtext(crop, **readtext_options), x, y))
+    return results, stats
@@ -0,0 +1,122 @@
+import io
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Les descripteurs ouverts sont accessibles par chemin (pour poppler, pdfminer...) via /proc
+PROC_FD_AVAILABLE = os.path.isdir('/proc/self/fd')
+
+# Octets réservés par les fichiers de travail en mémoire encore ouverts dans ce processus
+_memory_lock = threading.Lock()
+_memory_used = 0
+
+
+def _reserve_memory(size):
+    """Réserve `size` octets du budget PLAN_MEMORY_BUDGET ; False si le budget est épuisé"""
+    global _memory_used
+    with _memory_lock:
+        if _memory_used + size > settings.PLAN_MEMORY_BUDGET:
+            return False
+        _memory_used += size
+        return True
+
+
+def _release_memory(size):
+    global _memory_used
+    with _memory_lock:
+        _memory_used = max(_memory_used - size, 0)
+
+
+def memory_in_use():
+    """Octets actuellement réservés par les fichiers de travail en mémoire"""
+    with _memory_lock:
+        return _memory_used
+
+
+class MemoryScratchFile(io.BufferedRandom):
+    """memfd ouvert en lecture/écriture, qui rend sa réservation au budget mémoire à la fermeture"""
+
+    def __init__(self, fd, reserved):
+        super().__init__(io.FileIO(fd, 'r+b'))
+        self.reserved = reserved
+
+    def trim_reservation(self, size):
+        """Ramène la réservation à `size` octets, une fois la taille finale du contenu connue"""
+        if size < self.reserved:
+            _release_memory(self.reserved - size)
+            self.reserved = size
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self.reserved:
+                _release_memory(self.reserved)
+                self.reserved = 0
+
+
+def scratch_file(size=0, name='hiconvert'):
+    """
+    Fichier de travail anonyme, propre à un traitement (aucun nom partagé, donc aucune
+    collision entre requêtes) et supprimé à sa fermeture.
+    Jusqu'à PLAN_MEMORY_THRESHOLD octets il reste en mémoire (memfd, Linux), tant que
+    l'ensemble des fichiers en mémoire du processus tient dans PLAN_MEMORY_BUDGET (les plans
+    en file d'attente ne s'accumulent pas en RAM) ; sinon, ou sans memfd, c'est un fichier
+    temporaire sans nom dans TEMP_UPLOAD_FOLDER.
+    """
+    if (
+        PROC_FD_AVAILABLE and hasattr(os, 'memfd_create')
+        and size <= settings.PLAN_MEMORY_THRESHOLD and _reserve_memory(size)
+    ):
+        try:
+            return MemoryScratchFile(os.memfd_create(name, os.MFD_CLOEXEC), size)
+        except OSError:
+            _release_memory(size)
+            raise
+    return tempfile.TemporaryFile(dir=settings.TEMP_UPLOAD_FOLDER)
+
+
+def spill(fileobj):
+    """
+    Recopie le contenu d'un fichier de travail en mémoire dans un fichier temporaire
+    anonyme de TEMP_UPLOAD_FOLDER, positionné en fin de contenu, et ferme l'original.
+    """
+    disk = tempfile.TemporaryFile(dir=settings.TEMP_UPLOAD_FOLDER)
+    try:
+        fileobj.seek(0)
+        shutil.copyfileobj(fileobj, disk)
+    except Exception:
+        disk.close()
+        raise
+    fileobj.close()
+    return disk
+
+
+def spooled_file():
+    """Tampon en mémoire qui bascule sur un fichier temporaire au-delà de PLAN_MEMORY_THRESHOLD octets"""
+    return tempfile.SpooledTemporaryFile(max_size=settings.PLAN_MEMORY_THRESHOLD, dir=settings.TEMP_UPLOAD_FOLDER)
+
+
+@contextmanager
+def readable_path(fileobj, suffix='.pdf'):
+    """
+    Chemin lisible par ce processus et ses sous-processus (pdfinfo/pdftoppm) pour un
+    fichier ouvert, sans copie : /proc/<pid>/fd/<n>. Sans /proc, le contenu est copié
+    dans un fichier nommé unique, supprimé à la sortie du bloc.
+    """
+    fileobj.flush()
+    if PROC_FD_AVAILABLE:
+        yield f"/proc/{os.getpid()}/fd/{fileobj.fileno()}"
+        return
+
+    with tempfile.NamedTemporaryFile(dir=settings.TEMP_UPLOAD_FOLDER, suffix=suffix) as copy:
+        fileobj.seek(0)
+        shutil.copyfileobj(fileobj, copy)
+        copy.flush()
+        yield copy.name
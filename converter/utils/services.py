@@ -0,0 +1,57 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_instances = {}
+_lock = threading.Lock()
+
+
+def _get(name, factory):
+    """Construit un service au premier appel puis le réutilise"""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def peek(name):
+    """Retourne le service s'il a déjà été construit, sans le créer"""
+    return _instances.get(name)
+
+
+def get_pdf_processor():
+    """PDFProcessor partagé du worker (les modèles OCR se chargent au premier OCR)"""
+    from .pdf_processor import PDFProcessor
+    return _get('pdf_processor', PDFProcessor)
+
+
+def get_drive_service():
+    """
+    Client Google Drive partagé du worker. Une erreur d'initialisation (clé de compte de
+    service absente...) est levée à l'appel, sans empêcher le chargement de l'application.
+    """
+    from .google_drive_service import GoogleDriveService
+    return _get('drive_service', GoogleDriveService)
+
+
+def get_storage():
+    """
+    Stockage des fichiers produits, choisi par STORAGE_BACKEND :
+    'local' (disque UPLOAD_FOLDER) ou 'drive' (Google Drive).
+    """
+    from django.conf import settings
+    from .storage import LocalStorage, DriveStorage
+
+    def factory():
+        if settings.STORAGE_BACKEND == 'local':
+            return LocalStorage()
+        if settings.STORAGE_BACKEND == 'drive':
+            return DriveStorage(get_drive_service())
+        raise ValueError(f"STORAGE_BACKEND inconnu : {settings.STORAGE_BACKEND}")
+
+    return _get('storage', factory)
@@ -0,0 +1,260 @@
+import os
+import re
+import uuid
+import shutil
+import logging
+import mimetypes
+from django.conf import settings
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse
+)
+from django.urls import reverse
+from django.utils.http import http_date, parse_http_date_safe, content_disposition_header
+
+logger = logging.getLogger(__name__)
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+LOCAL_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _etag(stat):
+    return f'"{int(stat.st_mtime_ns):x}-{stat.st_size:x}"'
+
+
+def _iter_range(f, start, length, chunk_size=64 * 1024):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def _parse_range(header, size):
+    """
+    Interprète un en-tête Range à plage unique. Retourne (début, fin incluse),
+    None si l'en-tête est absent ou non pris en charge, ou False si la plage est invalide.
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return False
+    if not first:
+        # Suffixe : les N derniers octets
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def serve_file(request, path, content_type=None, filename=None, as_attachment=False):
+    """
+    Sert un fichier local en streaming avec ETag/Last-Modified, GET conditionnels
+    (If-None-Match, If-Modified-Since) et requêtes partielles (Range, If-Range).
+    """
+    stat = os.stat(path)
+    etag = _etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    filename = filename or os.path.basename(path)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    def finalize(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return finalize(HttpResponseNotModified())
+    else:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if since is not None and int(stat.st_mtime) <= since:
+            return finalize(HttpResponseNotModified())
+
+    byte_range = _parse_range(request.headers.get('Range'), stat.st_size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range.strip() not in (etag, last_modified):
+        # La version du client est périmée : renvoyer le fichier complet
+        byte_range = None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return finalize(response)
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(open(path, 'rb'), start, length), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+        return finalize(response)
+
+    response = FileResponse(
+        open(path, 'rb'), content_type=content_type, as_attachment=as_attachment, filename=filename
+    )
+    return finalize(response)
+
+
+def file_name(file):
+    """Nom de base d'un fichier à enregistrer (chemin ou objet fichier nommé)"""
+    return os.path.basename(file if isinstance(file, str) else file.name)
+
+
+class StorageBackend:
+    """
+    Stockage des fichiers produits (PDF, CSV). Chaque fichier est désigné par un ID
+    propre au moteur ; les vues ne manipulent que ces ID.
+    """
+
+    def save_many(self, files):
+        """
+        Enregistre une liste de (fichier, type MIME) ; retourne [{file_id, view_link, download_link}].
+        Le fichier est un chemin, ou un objet fichier nommé (django.core.files.File) lu depuis le début.
+        """
+        raise NotImplementedError
+
+    def save(self, file_path, mime_type):
+        return self.save_many([(file_path, mime_type)])[0]
+
+    def serve(self, request, file_id, as_attachment=False):
+        """Réponse HTTP affichant (ou téléchargeant) le fichier"""
+        raise NotImplementedError
+
+    def embed_url(self, file_id):
+        """URL à placer dans une iframe pour afficher le fichier"""
+        raise NotImplementedError
+
+    def download_url(self, file_id):
+        raise NotImplementedError
+
+    def filename(self, file_id):
+        """Nom d'origine du fichier"""
+        raise NotImplementedError
+
+    def open(self, file_id):
+        """Ouvre le fichier en lecture binaire"""
+        raise NotImplementedError
+
+    def local_path(self, file_id):
+        """Chemin local du fichier s'il est disponible sur le disque, sinon None"""
+        return None
+
+    def delete(self, file_id):
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Stockage sur le disque local (UPLOAD_FOLDER, ex: le disque 'uploads' de Render)"""
+
+    def __init__(self, root=None):
+        self.root = root or settings.UPLOAD_FOLDER
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, file_id):
+        if not LOCAL_ID_PATTERN.match(file_id or ''):
+            raise FileNotFoundError(f"ID de fichier invalide : {file_id}")
+        return os.path.join(self.root, file_id)
+
+    def local_path(self, file_id):
+        directory = self._dir(file_id)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Fichier {file_id} introuvable")
+        if not names:
+            raise FileNotFoundError(f"Fichier {file_id} introuvable")
+        return os.path.join(directory, names[0])
+
+    def _view_url(self, file_id, filename):
+        # Les CSV s'affichent dans la visionneuse paginée, les autres fichiers tels quels
+        if filename.lower().endswith('.csv'):
+            return reverse('view_csv', args=[file_id])
+        return reverse('view_file', args=[file_id])
+
+    def save_many(self, files):
+        results = []
+        for file, _ in files:
+            file_id = uuid.uuid4().hex
+            directory = self._dir(file_id)
+            os.makedirs(directory)
+            name = file_name(file)
+            if isinstance(file, str):
+                shutil.copyfile(file, os.path.join(directory, name))
+            else:
+                file.seek(0)
+                with open(os.path.join(directory, name), 'wb') as destination:
+                    shutil.copyfileobj(file, destination, 1024 * 1024)
+            logger.info(f"Fichier enregistré localement. ID: {file_id} ({name})")
+            results.append({
+                'file_id': file_id,
+                'view_link': self._view_url(file_id, name),
+                'download_link': reverse('download_file', args=[file_id])
+            })
+        return results
+
+    def serve(self, request, file_id, as_attachment=False):
+        return serve_file(request, self.local_path(file_id), as_attachment=as_attachment)
+
+    def embed_url(self, file_id):
+        return self._view_url(file_id, self.filename(file_id))
+
+    def download_url(self, file_id):
+        return reverse('download_file', args=[file_id])
+
+    def filename(self, file_id):
+        return os.path.basename(self.local_path(file_id))
+
+    def open(self, file_id):
+        return open(self.local_path(file_id), 'rb')
+
+    def delete(self, file_id):
+        shutil.rmtree(self._dir(file_id), ignore_errors=True)
+        return True
+
+
+class DriveStorage(StorageBackend):
+    """Stockage sur Google Drive : les fichiers sont servis par Drive lui-même"""
+
+    def __init__(self, drive_service):
+        self.drive = drive_service
+
+    def save_many(self, files):
+        return self.drive.upload_files(files)
+
+    def serve(self, request, file_id, as_attachment=False):
+        if as_attachment:
+            return HttpResponseRedirect(self.drive.get_download_url(file_id))
+        file_url = self.drive.get_file_url(file_id)
+        return HttpResponse(f'<iframe src="{file_url}" width="100%" height="100%" frameborder="0"></iframe>')
+
+    def embed_url(self, file_id):
+        return self.drive.get_file_url(file_id)
+
+    def download_url(self, file_id):
+        return self.drive.get_download_url(file_id)
+
+    def filename(self, file_id):
+        return self.drive.get_cached_metadata(file_id)['name']
+
+    def open(self, file_id):
+        return self.drive.open_file(file_id)
+
+    def delete(self, file_id):
+        return self.drive.delete_file(file_id)
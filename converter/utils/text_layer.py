@@ -0,0 +1,48 @@
+import logging
+import importlib.util
+
+logger = logging.getLogger(__name__)
+
+
+def is_available():
+    """Indique si la lecture de la couche texte est possible (pdfminer.six est optionnel)"""
+    return importlib.util.find_spec('pdfminer') is not None
+
+
+def _iter_text_lines(layout):
+    """Parcourt récursivement une mise en page pdfminer et génère ses lignes de texte"""
+    from pdfminer.layout import LTContainer, LTTextLine
+
+    for element in layout:
+        if isinstance(element, LTTextLine):
+            yield element
+        elif isinstance(element, LTContainer):
+            yield from _iter_text_lines(element)
+
+
+def iter_text_pages(pdf_path, dpi=200):
+    """
+    Lit le texte positionné directement dans les flux de contenu du PDF.
+    Génère (numéro de page, détections) où chaque détection a le format EasyOCR
+    (boîte de 4 points, texte, confiance). Les boîtes sont exprimées en pixels de
+    l'image qui serait rendue à `dpi`, pour rester comparables aux résultats de l'OCR.
+    """
+    if not is_available():
+        logger.warning("pdfminer.six n'est pas installé : couche texte ignorée")
+        return
+
+    from pdfminer.high_level import extract_pages
+
+    scale = dpi / 72.0
+    for page_number, page in enumerate(extract_pages(pdf_path), start=1):
+        detections = []
+        for line in _iter_text_lines(page):
+            text = line.get_text().strip()
+            if not text:
+                continue
+            x0, y0, x1, y1 = line.bbox
+            left, right = x0 * scale, x1 * scale
+            top, bottom = (page.height - y1) * scale, (page.height - y0) * scale
+            box = [[left, top], [right, top], [right, bottom], [left, bottom]]
+            detections.append((box, text, 1.0))
+        yield page_number, detections
@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class _Missing:
+    """Entrée négative : la ressource n'existe pas (l'erreur d'origine est conservée)"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class _Call:
+    """Chargement en cours, partagé par les appels concurrents sur la même clé"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Cache mémoire à expiration, borné en nombre d'entrées (éviction LRU).
+    get_or_load regroupe les chargements concurrents d'une même clé en un seul appel ;
+    les ressources absentes (is_missing(erreur) vrai) sont mémorisées negative_ttl secondes.
+    on_evict(clé, valeur), s'il est fourni, est appelé hors verrou pour chaque valeur qui
+    quitte le cache (expiration, éviction LRU, remplacement ou invalidation), par exemple
+    pour fermer les fichiers qu'elle garde ouverts.
+    """
+
+    def __init__(self, max_size=1024, ttl=300, negative_ttl=60, is_missing=None, on_evict=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.is_missing = is_missing or (lambda error: False)
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key, value, ttl, evicted):
+        """Enregistre une entrée ; à appeler sous verrou (les valeurs sorties sont ajoutées à evicted)"""
+        previous = self._entries.get(key)
+        if previous is not None and previous[1] is not value:
+            evicted.append((key, previous[1]))
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            old_key, (_, old_value) = self._entries.popitem(last=False)
+            evicted.append((old_key, old_value))
+
+    def _evicted(self, evicted):
+        """Notifie on_evict des valeurs sorties du cache (hors verrou)"""
+        if self.on_evict is None:
+            return
+        for key, value in evicted:
+            if not isinstance(value, _Missing):
+                self.on_evict(key, value)
+
+    def set(self, key, value, ttl=None):
+        evicted = []
+        with self._lock:
+            self._store(key, value, self.ttl if ttl is None else ttl, evicted)
+        self._evicted(evicted)
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._evicted([(key, entry[1])])
+
+    def _lookup(self, key, evicted):
+        """Retourne (trouvé, valeur) ; à appeler sous verrou"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            evicted.append((key, value))
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get_or_load(self, key, loader):
+        evicted = []
+        with self._lock:
+            found, value = self._lookup(key, evicted)
+            if not found:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+        self._evicted(evicted)
+
+        if found:
+            if isinstance(value, _Missing):
+                raise value.error
+            return value
+
+        if not leader:
+            # Un autre thread charge déjà cette clé : attendre son résultat
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            self.set(key, call.value)
+            return call.value
+        except Exception as e:
+            call.error = e
+            if self.is_missing(e):
+                self.set(key, _Missing(e), self.negative_ttl)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
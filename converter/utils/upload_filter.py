@@ -0,0 +1,116 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from .scratch import MemoryScratchFile, scratch_file, spill
+
+logger = logging.getLogger(__name__)
+
+PLAN_FILENAME = 'plan.pdf'
+
+
+def is_plan(relative_path):
+    return relative_path.replace('\\', '/').split('/')[-1].lower() == PLAN_FILENAME
+
+
+def plan_folder_name(relative_path):
+    """Nom du dossier parent d'un plan.pdf (avant-dernier élément du chemin), ou None"""
+    path_parts = relative_path.replace('\\', '/').split('/')
+    return path_parts[-2] if len(path_parts) > 1 and path_parts[-2] else None
+
+
+class PlanFile(UploadedFile):
+    """
+    Fichier reçu par PlanUploadHandler, avec le SHA-256 de son contenu calculé à la réception.
+    detach() remet son fichier de travail au traitement : la requête ne le fermera plus
+    à la fin de la réponse.
+    """
+
+    def __init__(self, file, name, content_type, size, charset, content_type_extra=None, sha256=None):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = sha256
+
+    def detach(self):
+        file, self.file = self.file, None
+        file.seek(0)
+        return file
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class PlanUploadHandler(FileUploadHandler):
+    """
+    Gestionnaire d'upload qui ne conserve que les plan.pdf du champ `field_name`.
+    Les autres fichiers (photos, DWG, tableurs...) sont ignorés au fil de la lecture :
+    leurs données ne sont ni gardées en mémoire ni écrites sur disque.
+    Un fichier conservé est écrit directement dans son fichier de travail (scratch_file) :
+    en mémoire jusqu'à PLAN_MEMORY_THRESHOLD octets (dans la limite de PLAN_MEMORY_BUDGET),
+    recopié une seule fois dans un fichier temporaire anonyme s'il dépasse ce seuil.
+    La position (dans l'envoi) de chaque fichier conservé est notée dans
+    request.upload_positions, pour retrouver son chemin relatif dans le champ 'paths'.
+
+    Il doit être le seul gestionnaire de la requête : lever SkipFile fermerait le
+    fichier précédent des autres gestionnaires, les fichiers ignorés sont donc
+    simplement absorbés ici.
+    """
+
+    def __init__(self, request=None, field_name='folder'):
+        super().__init__(request)
+        self.field_name = field_name
+        self.position = -1
+        self.skipping = False
+        self.skipped = 0
+        self.file = None
+        if request is not None:
+            request.upload_positions = []
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        if field_name == self.field_name:
+            self.position += 1
+            self.skipping = file_name.lower() != PLAN_FILENAME
+            if self.skipping:
+                self.skipped += 1
+                return
+            if self.request is not None:
+                self.request.upload_positions.append(self.position)
+        else:
+            self.skipping = False
+        super().new_file(field_name, file_name, *args, **kwargs)
+        # Réservation du seuil entier : la taille n'est connue qu'à la fin de la réception
+        self.file = scratch_file(settings.PLAN_MEMORY_THRESHOLD, name='hiconvert-upload')
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.skipping:
+            return None
+        self.received += len(raw_data)
+        if isinstance(self.file, MemoryScratchFile) and self.received > settings.PLAN_MEMORY_THRESHOLD:
+            self.file = spill(self.file)
+        self.file.write(raw_data)
+        self.digest.update(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.skipping:
+            return None
+        file, self.file = self.file, None
+        if isinstance(file, MemoryScratchFile):
+            file.trim_reservation(file_size)
+        file.seek(0)
+        return PlanFile(
+            file, self.file_name, self.content_type, file_size, self.charset,
+            self.content_type_extra, sha256=self.digest.hexdigest()
+        )
+
+    def upload_interrupted(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def upload_complete(self):
+        if self.skipped:
+            logger.info(f"{self.skipped} fichier(s) ignoré(s) pendant l'upload (pas un plan.pdf)")
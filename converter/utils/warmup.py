@@ -0,0 +1,69 @@
+import time
+import logging
+import threading
+from .services import get_pdf_processor, get_storage, peek
+
+logger = logging.getLogger(__name__)
+
+_status = {
+    'warmed_up': False,
+    'warmup_seconds': None,
+    'storage': 'pending',
+    'error': None
+}
+_lock = threading.Lock()
+
+
+def warm_up():
+    """
+    Préchauffe le worker : chargement des modèles OCR avec une inférence synthétique,
+    puis initialisation du stockage (client Google Drive le cas échéant). Les erreurs sont consignées dans l'état
+    de disponibilité au lieu d'être levées.
+    """
+    start = time.perf_counter()
+    try:
+        get_pdf_processor().warm_up()
+        with _lock:
+            _status['warmed_up'] = True
+    except Exception as e:
+        logger.error(f"Erreur lors du préchauffage des modèles OCR: {str(e)}")
+        with _lock:
+            _status['error'] = str(e)
+
+    try:
+        get_storage()
+        storage_status = 'ok'
+    except Exception as e:
+        storage_status = f"error: {str(e)}"
+    with _lock:
+        _status['storage'] = storage_status
+        _status['warmup_seconds'] = round(time.perf_counter() - start, 3)
+    logger.info(f"Worker préchauffé en {_status['warmup_seconds']} s (stockage : {storage_status})")
+
+
+def readiness():
+    """
+    État de disponibilité du worker. Avec WARMUP_ON_BOOT, rien n'est chargé ici : le worker
+    est prêt une fois les modèles OCR et le stockage préchauffés. Sans préchauffage, aucun
+    chargement des modèles n'a lieu avant le premier OCR : la disponibilité ne dépend alors
+    que du stockage, initialisé au besoin par cet appel (sinon /ready, qui conditionne
+    l'arrivée du trafic, ne passerait jamais à 200).
+    """
+    from django.conf import settings
+
+    processor = peek('pdf_processor')
+    with _lock:
+        status = dict(_status)
+    status['model_loaded'] = bool(processor and processor.is_model_loaded())
+    if status['storage'] == 'pending':
+        if peek('storage') is not None:
+            status['storage'] = 'ok'
+        elif not settings.WARMUP_ON_BOOT:
+            try:
+                get_storage()
+                status['storage'] = 'ok'
+            except Exception as e:
+                status['storage'] = f"error: {str(e)}"
+    status['model_required'] = settings.WARMUP_ON_BOOT
+    status['ready'] = (status['model_loaded'] or not settings.WARMUP_ON_BOOT) and status['storage'] == 'ok'
+    return status
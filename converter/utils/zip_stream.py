@@ -0,0 +1,42 @@
+import zipfile
+
+
+class _Sink:
+    """Flux d'écriture non positionnable : accumule les octets produits par zipfile jusqu'à leur envoi"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def iter_zip(entries, chunk_size=64 * 1024, compression=zipfile.ZIP_DEFLATED):
+    """
+    Génère une archive ZIP morceau par morceau, au fil de la compression.
+    `entries` est un itérable de (nom dans l'archive, fonction retournant un fichier
+    binaire ouvert). Les fichiers sont lus par blocs de chunk_size : la mémoire
+    utilisée ne dépend pas de la taille de l'archive. Le flux de sortie n'étant pas
+    positionnable, zipfile écrit les tailles et CRC dans des descripteurs de données.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=compression, allowZip64=True) as archive:
+        for arcname, opener in entries:
+            with opener() as source, archive.open(arcname, 'w', force_zip64=True) as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    # Répertoire central
+    yield from sink.drain()
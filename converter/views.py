@@ -1,213 +1,547 @@
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from django.core.files import File
+from functools import partial
 import os
-import pandas as pd
+import json
 import logging
-from .utils.google_drive_service import GoogleDriveService
-from .utils.pdf_processor import PDFProcessor
+from .utils.services import get_pdf_processor, get_storage
+from .utils.storage import serve_file
+from .utils.zip_stream import iter_zip
+from .utils.pdf_processor import PIPELINE_VERSION
+from .utils.job_queue import JobQueue
+from .utils.plan_records import PlanRecords, plan_files
+from .utils.result_cache import ResultCache, FileCache
+from .utils.report import REPORT_VERSION, build_report
+from .utils.warmup import readiness
+from .utils.ttl_cache import TTLCache
+from .utils.csv_index import CsvIndex
+from .utils.scratch import spooled_file, readable_path
+from .utils.chunked_upload import ChunkedUploads, UploadError
+from .utils.upload_filter import PlanUploadHandler, is_plan, plan_folder_name
 import shutil
-from datetime import datetime
+import hashlib
+import threading
+import uuid
 
 logger = logging.getLogger(__name__)
-drive_service = GoogleDriveService()
-pdf_processor = PDFProcessor()
+job_queue = JobQueue(dedicated={'report': settings.REPORT_WORKERS})
+plan_records = PlanRecords()
+chunked_uploads = ChunkedUploads()
+coordinate_cache = ResultCache('coordinates', PIPELINE_VERSION)
+report_cache = FileCache('reports', REPORT_VERSION, '.pdf')
+report_keys = TTLCache(max_size=1024, ttl=settings.REPORT_KEY_TTL)
+# Rendus de rapport en attente ou en cours dans ce worker : clé du rapport -> traitement
+pending_reports = {}
+report_lock = threading.Lock()
+csv_indexes = TTLCache(
+    max_size=settings.CSV_INDEX_CACHE_SIZE,
+    ttl=settings.CSV_INDEX_TTL,
+    is_missing=lambda error: isinstance(error, FileNotFoundError),
+    # Un index sorti du cache ne garde pas son fichier ouvert jusqu'au ramasse-miettes
+    on_evict=lambda file_id, index: index.close()
+)
 
 def index(request):
     return render(request, 'converter/index.html')
 
+def discover_plans(request):
+    """
+    Retrouve tous les plan.pdf du dossier envoyé et le nom de leur dossier parent.
+    Les chemins relatifs arrivent dans le champ 'paths', dans l'ordre des fichiers
+    (Django ne conserve que le nom de base des fichiers uploadés) ; seuls les plan.pdf
+    ont été conservés par PlanUploadHandler, à la position notée dans upload_positions.
+    Retourne ([(nom du dossier, fichier)], nombre de plan.pdf sans dossier parent).
+    """
+    files = request.FILES.getlist('folder')
+    paths = request.POST.getlist('paths')
+    positions = getattr(request, 'upload_positions', None) or list(range(len(files)))
+    logger.info(f"Nombre de plan.pdf reçus : {len(files)}")
+
+    plans = []
+    folders = set()
+    invalid = 0
+    for position, file in zip(positions, files):
+        relative_path = paths[position] if position < len(paths) else file.name
+        if not is_plan(relative_path):
+            continue
+        base = plan_folder_name(relative_path)
+        if not base:
+            logger.warning(f"plan.pdf sans dossier parent ignoré : {relative_path}")
+            invalid += 1
+            continue
+
+        # Les noms de dossier en double sont suffixés
+        folder_name, suffix = base, 2
+        while folder_name in folders:
+            folder_name, suffix = f"{base}_{suffix}", suffix + 1
+        folders.add(folder_name)
+        logger.info(f"Plan trouvé : {relative_path} -> {folder_name}")
+        plans.append((folder_name, file))
+    return plans, invalid
+
+def save_plan(folder_name, pdf_file):
+    """
+    Remet au traitement, sans copie, le fichier de travail d'un plan reçu par
+    PlanUploadHandler (en mémoire sous PLAN_MEMORY_THRESHOLD, sinon un fichier temporaire
+    anonyme) ; retourne (fichier ouvert, hash du contenu calculé à la réception).
+    """
+    logger.info(f"Réception du PDF {folder_name} ({pdf_file.size} octets)")
+    return pdf_file.detach(), pdf_file.sha256
+
+def stream_job_events(job_ids):
+    """
+    Événements NDJSON (un objet JSON par ligne) des traitements suivis : avancement,
+    puis résultats de chaque plan dès qu'il est terminé, sans attendre les autres.
+    """
+    for state in job_queue.watch(job_ids, timeout=settings.JOB_STREAM_TIMEOUT):
+        event = {
+            'job_id': state['id'],
+            'folder': state.get('label'),
+            'status': state['status'],
+            'stage': state.get('stage'),
+            'progress': state.get('progress'),
+            'current': state.get('current'),
+            'total': state.get('total')
+        }
+        if state['status'] == 'done':
+            event.update(event='result', results=state['results'])
+        elif state['status'] == 'error':
+            event.update(event='error', error=state['error'])
+        elif state['status'] == 'unknown':
+            event.update(event='error', error='Traitement introuvable')
+        else:
+            event['event'] = 'progress'
+        yield json.dumps(event) + '\n'
+    yield json.dumps({'event': 'end'}) + '\n'
+
+def ndjson_response(events):
+    response = StreamingHttpResponse(events, content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un éventuel proxy : chaque ligne part immédiatement
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def requested_job_ids(request):
+    """ID de traitements passés en paramètre (?jobs=id1,id2 ou ?jobs=id1&jobs=id2)"""
+    return list(dict.fromkeys(
+        job_id.strip() for value in request.GET.getlist('jobs') for job_id in value.split(',') if job_id.strip()
+    ))
+
 @csrf_exempt
 def process_files(request):
-    """Traite les fichiers du dossier sélectionné et les upload sur Google Drive"""
+    """
+    Reçoit le dossier sélectionné, planifie le traitement de chacun de ses plan.pdf
+    (traités en parallèle) et répond aussitôt (202) avec les traitements acceptés.
+    Le client suit ensuite l'avancement et les résultats sur events_url (NDJSON, /jobs/stream) :
+    la requête d'envoi n'occupe pas un thread du worker pendant les traitements.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
 
+    # Les fichiers autres que plan.pdf sont écartés pendant la lecture de la requête
+    upload_handler = PlanUploadHandler(request)
+    request.upload_handlers = [upload_handler]
+
     if 'folder' not in request.FILES:
+        if upload_handler.skipped:
+            logger.error("Aucun fichier plan.pdf n'a été trouvé")
+            return JsonResponse({'error': 'plan.pdf non trouvé dans le dossier'}, status=400)
         logger.error("Aucun fichier n'a été fourni dans la requête")
         return JsonResponse({'error': 'Aucun dossier fourni'}, status=400)
 
-    results = []
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    temp_dir = os.path.join(settings.TEMP_UPLOAD_FOLDER, timestamp)
-    os.makedirs(temp_dir, exist_ok=True)
-
     try:
-        # Parcourir les fichiers uploadés
-        pdf_file = None
-        folder_name = None
-        files = request.FILES.getlist('folder')
-        
-        logger.info(f"Nombre de fichiers reçus : {len(files)}")
-        
-        # Trouver le fichier plan.pdf et extraire le nom du dossier
-        for file in files:
-            logger.info(f"Fichier reçu : {file.name}, Chemin relatif : {getattr(file, 'webkitRelativePath', '')}")
-            if file.name.lower() == 'plan.pdf':
-                pdf_file = file
-                # Récupérer le chemin relatif complet
-                relative_path = getattr(file, 'webkitRelativePath', '') or getattr(file, 'name', '')
-                logger.info(f"Chemin relatif du PDF : {relative_path}")
-                
-                # Extraire le nom du dossier parent
-                path_parts = relative_path.replace('\\', '/').split('/')
-                logger.info(f"Segments du chemin : {path_parts}")
-                
-                if len(path_parts) > 1:
-                    # Le dossier parent est l'avant-dernier élément
-                    folder_name = path_parts[-2]
-                    logger.info(f"Nom du dossier extrait : {folder_name}")
-                    break
-
-        if not pdf_file:
+        plans, invalid = discover_plans(request)
+        if not plans:
+            if invalid:
+                logger.error("Impossible d'extraire le nom du dossier parent")
+                return JsonResponse({'error': 'Structure de dossier invalide'}, status=400)
             logger.error("Aucun fichier plan.pdf n'a été trouvé")
             return JsonResponse({'error': 'plan.pdf non trouvé dans le dossier'}, status=400)
 
-        if not folder_name:
-            logger.error("Impossible d'extraire le nom du dossier parent")
-            return JsonResponse({'error': 'Structure de dossier invalide'}, status=400)
+        # Le traitement lourd tourne en arrière-plan ; le client suit les plans sur events_url
+        accepted = []
+        for folder_name, pdf_file in plans:
+            pdf, content_hash = save_plan(folder_name, pdf_file)
+            accepted.append(submit_plan(pdf, folder_name, content_hash))
+        logger.info(f"{len(accepted)} plan(s) planifié(s)")
 
-        try:
-            # Sauvegarder le PDF temporairement avec le nouveau nom
-            pdf_filename = f"{folder_name}.pdf"
-            pdf_path = os.path.join(temp_dir, pdf_filename)
-            logger.info(f"Sauvegarde du PDF : {pdf_path}")
-            
-            with open(pdf_path, 'wb+') as destination:
-                for chunk in pdf_file.chunks():
-                    destination.write(chunk)
-
-            # Traiter le PDF et générer le CSV
-            logger.info("Extraction des coordonnées du PDF")
-            coordinates = pdf_processor.extract_coordinates(pdf_path)
-            
-            csv_filename = f"{folder_name}.csv"
-            csv_path = os.path.join(temp_dir, csv_filename)
-            logger.info(f"Génération du CSV : {csv_path}")
-            pd.DataFrame(coordinates).to_csv(csv_path, index=False)
-
-            # Upload les fichiers sur Google Drive
-            logger.info("Upload du PDF sur Google Drive")
-            pdf_drive = drive_service.upload_file(pdf_path, 'application/pdf')
-            logger.info("Upload du CSV sur Google Drive")
-            csv_drive = drive_service.upload_file(csv_path, 'text/csv')
-
-            results.append({
-                'pdf': {
-                    'name': pdf_filename,
-                    'download_url': pdf_drive['download_link'],
-                    'view_url': pdf_drive['view_link'],
-                    'file_id': pdf_drive['file_id']
-                },
-                'csv': {
-                    'name': csv_filename,
-                    'download_url': csv_drive['download_link'],
-                    'view_url': csv_drive['view_link'],
-                    'file_id': csv_drive['file_id']
-                }
-            })
-
-            # Nettoyer les fichiers temporaires
-            shutil.rmtree(temp_dir)
-            logger.info("Traitement terminé avec succès")
-
-            return JsonResponse({
-                'success': True,
-                'message': 'Fichiers traités et uploadés avec succès',
-                'results': results
-            })
-
-        except Exception as e:
-            logger.error(f"Erreur lors du traitement des fichiers: {str(e)}")
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            return JsonResponse({'error': str(e)}, status=500)
+        job_ids = ','.join(plan['job_id'] for plan in accepted)
+        return JsonResponse({
+            'event': 'accepted',
+            'plans': accepted,
+            'events_url': f"{reverse('job_events')}?jobs={job_ids}"
+        }, status=202)
 
     except Exception as e:
         logger.error(f"Erreur lors du traitement des fichiers: {str(e)}")
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
         return JsonResponse({'error': str(e)}, status=500)
 
+def submit_plan(pdf, folder_name, content_hash):
+    """Planifie le traitement d'un plan reçu (fichier ouvert) ; retourne sa description pour le client"""
+    job_id = job_queue.submit(process_plan, pdf, folder_name, content_hash, kind='plan')
+    job_queue.update(job_id, label=folder_name)
+    return {
+        'folder': folder_name,
+        'job_id': job_id,
+        'status_url': reverse('job_status', args=[job_id])
+    }
+
+def upload_error_response(error):
+    data = {'error': str(error)}
+    if error.offset is not None:
+        data['offset'] = error.offset
+    return JsonResponse(data, status=error.status)
+
+@csrf_exempt
+def upload_create(request):
+    """
+    Démarre l'envoi par morceaux d'un plan.pdf.
+    Corps JSON : {"path": chemin relatif (Dossier/plan.pdf), "size": taille en octets}.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+    try:
+        payload = json.loads(request.body or b'{}')
+        if not isinstance(payload, dict):
+            raise ValueError('objet JSON attendu')
+        relative_path = str(payload.get('path', ''))
+        size = int(payload.get('size', 0))
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Requête invalide'}, status=400)
+
+    if not is_plan(relative_path):
+        return JsonResponse({'error': 'Seuls les fichiers plan.pdf sont acceptés'}, status=400)
+    folder_name = plan_folder_name(relative_path)
+    if not folder_name:
+        return JsonResponse({'error': 'Structure de dossier invalide'}, status=400)
+
+    try:
+        upload = chunked_uploads.create('plan.pdf', size, path=relative_path, folder=folder_name)
+    except UploadError as e:
+        return upload_error_response(e)
+    upload['upload_url'] = reverse('upload_chunk', args=[upload['id']])
+    return JsonResponse(upload, status=201)
+
+@csrf_exempt
+def upload_chunk(request, upload_id):
+    """
+    GET : état de l'envoi (position de reprise). PUT ?offset=N : morceau brut commençant
+    à N (renvoyer un morceau déjà reçu est sans effet). DELETE : abandon de l'envoi.
+    """
+    try:
+        if request.method == 'GET':
+            return JsonResponse(chunked_uploads.status(upload_id))
+        if request.method == 'DELETE':
+            chunked_uploads.status(upload_id)
+            chunked_uploads.abort(upload_id)
+            return JsonResponse({'success': True})
+        if request.method != 'PUT':
+            return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+
+        try:
+            offset = int(request.GET.get('offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return JsonResponse({'error': 'Position ou taille du morceau manquante'}, status=400)
+        # Lecture en flux du corps : le morceau n'est jamais chargé entièrement en mémoire
+        received = chunked_uploads.write_chunk(upload_id, offset, request, length)
+        return JsonResponse({'id': upload_id, 'offset': received})
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        logger.error(f"Erreur lors de la réception d'un morceau de l'envoi {upload_id}: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+@csrf_exempt
+def upload_complete(request, upload_id):
+    """
+    Finalise un envoi complet et planifie aussitôt le traitement du plan.
+    Corps JSON facultatif : {"sha256": empreinte attendue} pour vérifier l'intégrité.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Requête invalide'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Requête invalide'}, status=400)
+
+    try:
+        meta, content_hash, pdf = chunked_uploads.finalize(upload_id, payload.get('sha256'))
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        logger.error(f"Erreur lors de la finalisation de l'envoi {upload_id}: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+    plan = submit_plan(pdf, meta['folder'], content_hash)
+    plan['sha256'] = content_hash
+    return JsonResponse(plan, status=202)
+
+def job_events(request):
+    """Reprend le suivi NDJSON de traitements déjà planifiés (?jobs=id1,id2)"""
+    job_ids = requested_job_ids(request)
+    if not job_ids:
+        return JsonResponse({'error': 'Aucun traitement demandé'}, status=400)
+    return ndjson_response(stream_job_events(job_ids))
+
+def extract_with_cache(pdf, content_hash, progress_callback=None):
+    """
+    Extrait les coordonnées d'un PDF (fichier ouvert) en passant par le cache des résultats.
+    Retourne (CoordinateTable, télémétrie par page, résultat issu du cache ou non).
+    """
+    from .utils.coordinate_table import CoordinateTable
+
+    key = coordinate_cache.make_key(content_hash, **get_pdf_processor().extraction_settings())
+    cached = coordinate_cache.get(key)
+    if cached is not None and 'table' in cached:
+        logger.info(f"Coordonnées trouvées dans le cache pour {content_hash}")
+        return CoordinateTable.from_columns(cached['table']), cached['pages'], True
+
+    telemetry = []
+    # poppler et pdfminer lisent le fichier de travail directement, sans copie
+    with readable_path(pdf) as pdf_path:
+        coordinates = get_pdf_processor().extract_coordinates(
+            pdf_path, progress_callback=progress_callback, telemetry=telemetry
+        )
+    coordinate_cache.set(key, {'table': coordinates.to_columns(), 'pages': telemetry})
+    return coordinates, telemetry, False
+
+def output_formats():
+    """Formats produits en plus du CSV (COORDINATE_FORMATS), limités à ceux disponibles"""
+    from .utils.coordinate_table import available_formats
+
+    requested = [name.strip().lower() for name in settings.COORDINATE_FORMATS.split(',') if name.strip()]
+    available = available_formats()
+    for name in requested:
+        if name not in available:
+            logger.warning(f"Format de sortie {name} indisponible (inconnu, ou pyarrow absent), ignoré")
+    return [name for name in requested if name in available and name != 'csv']
+
+def stored_file(name, stored):
+    return {
+        'name': name,
+        'download_url': stored['download_link'],
+        'view_url': stored['view_link'],
+        'file_id': stored['file_id']
+    }
+
+def process_plan(job, pdf, folder_name, content_hash):
+    """
+    Traite un plan en arrière-plan : OCR, CSV (et autres formats) puis enregistrement
+    dans le stockage. Les fichiers produits sont construits dans des tampons en mémoire
+    (basculés sur un fichier temporaire anonyme au-delà de PLAN_MEMORY_THRESHOLD)
+    et envoyés directement depuis ces tampons.
+    """
+    from .utils.coordinate_table import FORMATS
+
+    outputs = []
+    try:
+        pdf_filename = f"{folder_name}.pdf"
+
+        # Traiter le PDF et générer le CSV
+        logger.info("Extraction des coordonnées du PDF")
+        coordinates, telemetry, cached = extract_with_cache(pdf, content_hash, job.report)
+        
+        # Écrire les coordonnées dans chaque format demandé, CSV en premier
+        for fmt in ['csv'] + output_formats():
+            extension, mime_type = FORMATS[fmt]
+            buffer = spooled_file()
+            outputs.append((fmt, File(buffer, name=f"{folder_name}{extension}"), mime_type))
+            coordinates.write(buffer, fmt, crs=settings.COORDINATE_CRS or None)
+
+        # Enregistrer les fichiers dans le stockage (disque local ou Google Drive)
+        job.report('upload')
+        logger.info(f"Enregistrement du PDF et de {len(outputs)} fichier(s) de coordonnées dans le stockage")
+        stored = get_storage().save_many(
+            [(File(pdf, name=pdf_filename), 'application/pdf')]
+            + [(file, mime_type) for _, file, mime_type in outputs]
+        )
+        files = {fmt: stored_file(file.name, item) for (fmt, file, _), item in zip(outputs, stored[1:])}
+
+        results = [{
+            'pdf': stored_file(pdf_filename, stored[0]),
+            'csv': files.pop('csv'),
+            'outputs': files,
+            'points': len(coordinates),
+            'pages': telemetry,
+            'cached': cached
+        }]
+        # Les fichiers stockés restent exportables après la purge de l'état du traitement
+        try:
+            plan_records.save(job.job_id, results)
+        except OSError as e:
+            logger.warning(f"Enregistrement du traitement {job.job_id} impossible: {str(e)}")
+        logger.info("Traitement terminé avec succès")
+        return results
+    finally:
+        # Libérer le fichier de travail et les tampons
+        pdf.close()
+        for _, file, _ in outputs:
+            file.close()
+
+def job_status(request, job_id):
+    """Retourne l'état d'avancement d'un traitement"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return JsonResponse({'error': 'Traitement introuvable'}, status=404)
+    return JsonResponse(job)
+
+def ready(request):
+    """
+    Sonde de disponibilité : 200 une fois les modèles OCR (avec WARMUP_ON_BOOT) et le
+    stockage prêts, 503 sinon
+    """
+    status = readiness()
+    return JsonResponse(status, status=200 if status['ready'] else 503)
+
+def cache_stats(request):
+    """Statistiques du cache des coordonnées (compteurs propres à ce worker)"""
+    return JsonResponse(coordinate_cache.stats())
+
+def export_jobs(request):
+    """
+    Exporte dans une archive ZIP, envoyée en streaming au fil de la compression,
+    les PDF, CSV et autres formats de coordonnées d'un ou plusieurs traitements (?jobs=id1,id2 ou ?jobs=id1&jobs=id2).
+    Les fichiers viennent du registre persistant des plans (PlanRecords) ; l'état de la file
+    d'attente ne sert qu'aux traitements pas encore enregistrés (en cours, en erreur...).
+    """
+    job_ids = requested_job_ids(request)
+    if not job_ids:
+        return JsonResponse({'error': 'Aucun traitement demandé'}, status=400)
+    if len(job_ids) > settings.EXPORT_MAX_JOBS:
+        return JsonResponse({'error': f'Au plus {settings.EXPORT_MAX_JOBS} traitements par export'}, status=400)
+
+    files = []
+    folders = set()
+    missing, pending, failed, invalid = [], [], [], []
+    for job_id in job_ids:
+        record = plan_records.get(job_id)
+        if record is not None:
+            plans = record['plans']
+        else:
+            job = job_queue.get(job_id)
+            if job is None:
+                missing.append(job_id)
+                continue
+            if job.get('kind') != 'plan':
+                # Rapports et autres traitements : aucun plan à exporter
+                invalid.append(job_id)
+                continue
+            if job['status'] == 'error':
+                failed.append(job_id)
+                continue
+            if job['status'] != 'done':
+                pending.append(job_id)
+                continue
+            plans = plan_files(job['results'])
+        for plan in plans:
+            # Un dossier par plan dans l'archive ; les noms en double sont suffixés
+            folder, suffix = plan['name'], 2
+            while folder in folders:
+                folder, suffix = f"{plan['name']}_{suffix}", suffix + 1
+            folders.add(folder)
+            for stored in plan['files']:
+                files.append((f"{folder}/{stored['name']}", stored['file_id']))
+
+    if missing:
+        return JsonResponse({'error': 'Traitements introuvables', 'jobs': missing}, status=404)
+    if invalid:
+        return JsonResponse({'error': 'Traitements sans plan à exporter', 'jobs': invalid}, status=400)
+    if failed:
+        return JsonResponse({'error': 'Traitements en erreur', 'jobs': failed}, status=409)
+    if pending:
+        return JsonResponse({'error': 'Traitements non terminés', 'jobs': pending}, status=409)
+
+    storage = get_storage()
+    entries = [(name, partial(storage.open, file_id)) for name, file_id in files]
+    logger.info(f"Export ZIP de {len(job_ids)} traitement(s), {len(entries)} fichier(s)")
+    filename = f"{folders.pop()}.zip" if len(folders) == 1 else 'plans_et_coordonnees.zip'
+    response = StreamingHttpResponse(iter_zip(entries), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
 def view_file(request, file_id):
-    """Vue pour afficher un fichier depuis Google Drive"""
+    """Vue pour afficher un fichier du stockage"""
     try:
-        file_url = drive_service.get_file_url(file_id)
-        return HttpResponse(f'<iframe src="{file_url}" width="100%" height="100%" frameborder="0"></iframe>')
+        return get_storage().serve(request, file_id)
     except Exception as e:
         logger.error(f"Erreur lors de l'affichage du fichier: {str(e)}")
         return JsonResponse({'error': 'Fichier non trouvé'}, status=404)
 
 def download_file(request, file_id):
-    """Télécharger un fichier depuis Google Drive"""
+    """Télécharger un fichier du stockage"""
     try:
-        download_url = drive_service.get_download_url(file_id)
-        return HttpResponse(download_url)
+        return get_storage().serve(request, file_id, as_attachment=True)
     except Exception as e:
         logger.error(f"Erreur lors du téléchargement du fichier: {str(e)}")
         return JsonResponse({'error': 'Fichier non trouvé'}, status=404)
 
-def download_both(request, csv_path):
-    """Télécharger les deux fichiers dans un zip"""
-    import zipfile
-    from io import BytesIO
-    
-    csv_filepath = os.path.join(settings.UPLOAD_FOLDER, csv_path)
-    pdf_filepath = os.path.join(settings.UPLOAD_FOLDER, os.path.dirname(csv_path), 'plan.pdf')
-    
-    if not os.path.exists(csv_filepath) or not os.path.exists(pdf_filepath):
-        return JsonResponse({'error': 'Fichiers non trouvés'}, status=404)
-    
+def load_csv_index(file_id):
+    """Index des lignes d'un CSV du stockage, construit au premier accès puis conservé en mémoire"""
+    return csv_indexes.get_or_load(file_id, lambda: CsvIndex(get_storage().open(file_id)))
+
+def coordinates_api(request, file_id):
+    """
+    Coordonnées d'un CSV par pages, au format JSON.
+    Paramètres : page (à partir de 1), page_size, sort (nom de colonne), order (asc ou desc).
+    """
     try:
-        # Créer un fichier ZIP en mémoire
-        memory_file = BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            # Ajouter les fichiers au ZIP avec des noms de base
-            zf.write(pdf_filepath, 'plan.pdf')
-            zf.write(csv_filepath, os.path.basename(csv_filepath))
-        
-        # Préparer la réponse
-        memory_file.seek(0)
-        response = HttpResponse(memory_file.read(), content_type='application/zip')
-        response['Content-Disposition'] = f'attachment; filename=plan_et_coordonnees.zip'
-        
-        return response
-    except Exception as e:
-        logger.error(f"Erreur lors de la création du ZIP: {str(e)}")
-        return JsonResponse({'error': 'Erreur lors de la création du ZIP'}, status=500)
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', 100))
+    except ValueError:
+        return JsonResponse({'error': 'Paramètres de pagination invalides'}, status=400)
+    if page < 1 or not 1 <= page_size <= settings.COORDINATES_MAX_PAGE_SIZE:
+        return JsonResponse({'error': f'page_size doit être compris entre 1 et {settings.COORDINATES_MAX_PAGE_SIZE}'}, status=400)
 
-def view_csv(request, filename):
-    """Vue pour afficher le contenu du CSV dans le navigateur"""
-    filepath = os.path.join(settings.UPLOAD_FOLDER, filename)
-    if not os.path.exists(filepath):
+    try:
+        index = load_csv_index(file_id)
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture du CSV {file_id}: {str(e)}")
         return JsonResponse({'error': 'Fichier non trouvé'}, status=404)
-    
+
+    sort = request.GET.get('sort') or None
+    if sort and sort not in index.columns:
+        return JsonResponse({'error': f'Colonne de tri inconnue : {sort}'}, status=400)
+
+    descending = request.GET.get('order') == 'desc'
     try:
-        import pandas as pd
-        # Lire le CSV avec pandas
-        df = pd.read_csv(filepath, sep=';')
-        # Convertir en HTML avec style Bootstrap
-        html_table = df.to_html(
-            classes=['table', 'table-striped', 'table-hover', 'table-bordered'],
-            float_format=lambda x: '{:.3f}'.format(x),
-            index=False
-        )
-        
+        data = index.page(page, page_size, sort=sort, descending=descending)
+    except ValueError:
+        if not index.closed:
+            raise
+        # Index évincé (donc fermé) entre sa lecture dans le cache et son utilisation
+        data = load_csv_index(file_id).page(page, page_size, sort=sort, descending=descending)
+    data['file_id'] = file_id
+    return JsonResponse(data)
+
+def view_csv(request, file_id):
+    """Vue pour afficher le contenu du CSV dans le navigateur (lignes chargées par pages)"""
+    try:
+        index = load_csv_index(file_id)
         context = {
-            'filename': os.path.basename(filename),
-            'table': html_table,
-            'total_rows': len(df)
+            'file_id': file_id,
+            'filename': get_storage().filename(file_id),
+            'columns': index.columns,
+            'total_rows': len(index),
+            'api_url': reverse('coordinates_api', args=[file_id])
         }
         return render(request, 'converter/view_csv.html', context)
     except Exception as e:
-        logger.error(f"Erreur lors de la lecture du CSV {filename}: {str(e)}")
-        return JsonResponse({'error': 'Erreur lors de la lecture du fichier'}, status=500)
+        logger.error(f"Erreur lors de la lecture du CSV {file_id}: {str(e)}")
+        return JsonResponse({'error': 'Fichier non trouvé'}, status=404)
 
 def view_both(request, pdf_id, csv_id):
     """Vue pour afficher à la fois le PDF et le CSV"""
     try:
-        pdf_url = drive_service.get_file_url(pdf_id)
-        csv_url = drive_service.get_file_url(csv_id)
+        pdf_url = get_storage().embed_url(pdf_id)
+        csv_url = get_storage().embed_url(csv_id)
         
         html_content = f'''
         <!DOCTYPE html>
@@ -243,8 +577,8 @@ def view_both(request, pdf_id, csv_id):
 def download_both(request, pdf_id, csv_id):
     """Télécharger les deux fichiers"""
     try:
-        pdf_url = drive_service.get_download_url(pdf_id)
-        csv_url = drive_service.get_download_url(csv_id)
+        pdf_url = get_storage().download_url(pdf_id)
+        csv_url = get_storage().download_url(csv_id)
         
         html_content = f'''
         <!DOCTYPE html>
@@ -284,115 +618,78 @@ def view_pdf(request, filename):
         return JsonResponse({'error': 'Fichier non trouvé'}, status=404)
     
     try:
-        with open(filepath, 'rb') as pdf:
-            response = HttpResponse(pdf.read(), content_type='application/pdf')
-            response['Content-Disposition'] = 'inline; filename=' + os.path.basename(filename)
-            return response
+        return serve_file(request, filepath, content_type='application/pdf')
     except Exception as e:
         logger.error(f"Erreur lors de la lecture du PDF {filename}: {str(e)}")
         return JsonResponse({'error': 'Erreur lors de la lecture du fichier'}, status=500)
 
-def generate_report(request, csv_path):
-    """Générer un rapport PDF avec statistiques"""
-    import pandas as pd
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from io import BytesIO
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    from datetime import datetime
-    
-    csv_filepath = os.path.join(settings.UPLOAD_FOLDER, csv_path)
-    if not os.path.exists(csv_filepath):
-        return JsonResponse({'error': 'Fichier CSV non trouvé'}, status=404)
-    
+def report_key(csv_id):
+    """Clé du rapport d'un CSV : hash de son contenu et réglages du rendu (mémorisée par ID)"""
+    def load():
+        digest = hashlib.sha256()
+        with get_storage().open(csv_id) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return report_cache.make_key(digest.hexdigest(), max_scatter_points=settings.REPORT_MAX_SCATTER_POINTS)
+    return report_keys.get_or_load(csv_id, load)
+
+def build_report_job(job, csv_id, key):
+    """Génère en arrière-plan le rapport PDF d'un CSV et le place dans le cache"""
+    job.report('report')
+    storage = get_storage()
+    temp_dir = os.path.join(settings.TEMP_UPLOAD_FOLDER, uuid.uuid4().hex)
+    os.makedirs(temp_dir, exist_ok=True)
     try:
-        # Lire les données
-        df = pd.read_csv(csv_filepath, sep=';')
-        
-        # Créer un buffer pour le PDF
-        buffer = BytesIO()
-        
-        # Créer le document PDF
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Titre
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30
-        )
-        story.append(Paragraph("Rapport d'Analyse des Coordonnées", title_style))
-        story.append(Spacer(1, 12))
-        
-        # Informations générales
-        story.append(Paragraph(f"Date du rapport : {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
-        story.append(Paragraph(f"Fichier source : {os.path.basename(csv_filepath)}", styles['Normal']))
-        story.append(Paragraph(f"Nombre total de points : {len(df)}", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Statistiques descriptives
-        story.append(Paragraph("Statistiques Descriptives", styles['Heading2']))
-        stats_df = df.describe()
-        stats_table = Table([
-            ['Statistique', 'Coordonnée X', 'Coordonnée Y']
-        ] + [
-            [index, f"{row['X']:.2f}", f"{row['Y']:.2f}"]
-            for index, row in stats_df.iterrows()
-        ])
-        stats_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(stats_table)
-        story.append(Spacer(1, 20))
-        
-        # Graphique de dispersion
-        plt.figure(figsize=(10, 6))
-        sns.scatterplot(data=df, x='X', y='Y', alpha=0.6)
-        plt.title('Distribution des Points')
-        plt.xlabel('Coordonnée X')
-        plt.ylabel('Coordonnée Y')
-        
-        # Sauvegarder le graphique
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        # Ajouter le graphique au PDF
-        story.append(Paragraph("Distribution des Points", styles['Heading2']))
-        img = Image(img_buffer, width=6*inch, height=4*inch)
-        story.append(img)
-        
-        # Générer le PDF
-        doc.build(story)
-        buffer.seek(0)
-        
-        # Retourner le PDF
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename=rapport_coordonnees_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        
-        return response
-        
+        output_path = os.path.join(temp_dir, 'rapport.pdf')
+        with storage.open(csv_id) as f:
+            build_report(f, storage.filename(csv_id), output_path, settings.REPORT_MAX_SCATTER_POINTS)
+        report_cache.put(key, output_path)
+        return {'report_url': reverse('generate_report', args=[csv_id])}
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def prune_pending_reports():
+    """Oublie les rendus de rapport terminés, en erreur ou expirés (à appeler sous report_lock)"""
+    for key, job_id in list(pending_reports.items()):
+        job = job_queue.get(job_id)
+        if job is None or job['status'] in ('done', 'error'):
+            del pending_reports[key]
+
+def generate_report(request, csv_id):
+    """
+    Rapport PDF avec statistiques d'un CSV. Servi immédiatement s'il est déjà en cache ;
+    sinon sa génération est planifiée en arrière-plan et la réponse (202) indique le
+    traitement à suivre. Avec ?prepare=1, la réponse est toujours du JSON.
+    """
+    try:
+        key = report_key(csv_id)
     except Exception as e:
-        logger.error(f"Erreur lors de la génération du rapport: {str(e)}")
-        return JsonResponse({'error': 'Erreur lors de la génération du rapport'}, status=500)
+        logger.error(f"Erreur lors de la lecture du CSV {csv_id}: {str(e)}")
+        return JsonResponse({'error': 'Fichier CSV non trouvé'}, status=404)
+
+    report_url = reverse('generate_report', args=[csv_id])
+    path = report_cache.get_path(key)
+    if path is not None:
+        if request.GET.get('prepare'):
+            return JsonResponse({'ready': True, 'report_url': report_url})
+        name = os.path.splitext(get_storage().filename(csv_id))[0]
+        return serve_file(request, path, content_type='application/pdf',
+                          filename=f"rapport_{name}.pdf", as_attachment=True)
+
+    # Un seul rendu par rapport à la fois dans ce worker
+    with report_lock:
+        prune_pending_reports()
+        job_id = pending_reports.get(key)
+        if job_id is None:
+            job_id = job_queue.submit(build_report_job, csv_id, key, kind='report')
+            pending_reports[key] = job_id
+
+    return JsonResponse({
+        'ready': False,
+        'job_id': job_id,
+        'status_url': reverse('job_status', args=[job_id]),
+        'report_url': report_url
+    }, status=202)
 
 def allowed_file(filename):
     """Vérifie si le fichier est nommé exactement 'plan.pdf'"""
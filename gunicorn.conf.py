@@ -0,0 +1,20 @@
+# Configuration gunicorn (chargée via -c gunicorn.conf.py)
+import threading
+
+
+def post_worker_init(worker):
+    """
+    Préchauffe chaque worker avant qu'il n'accepte des requêtes : au déploiement comme
+    après chaque recyclage --max-requests, le premier /process ne paie pas le chargement.
+    """
+    from django.conf import settings
+    if not settings.WARMUP_ON_BOOT:
+        return
+
+    from converter.utils.warmup import warm_up
+    thread = threading.Thread(target=warm_up, name='hiconvert-warmup')
+    thread.start()
+    # Signaler régulièrement que le worker est vivant pour ne pas dépasser --timeout
+    while thread.is_alive():
+        worker.notify()
+        thread.join(timeout=1)
@@ -94,6 +94,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', os.path.join(MEDIA_ROOT, 'uploads'))
 MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 20 * 1024 * 1024))  # 20MB par défaut
 
+# Un dossier de projet envoyé sur /process peut contenir des centaines de fichiers ;
+# seuls les plan.pdf sont conservés (PlanUploadHandler), les autres ne coûtent que leur lecture
+DATA_UPLOAD_MAX_NUMBER_FILES = int(os.getenv('DATA_UPLOAD_MAX_NUMBER_FILES', 10000))
+
 # Configuration Google Drive
 GOOGLE_DRIVE_SETTINGS = {
     'service_account_file': os.path.join(BASE_DIR, 'service-account-key.json'),
@@ -103,3 +107,114 @@ GOOGLE_DRIVE_SETTINGS = {
 TEMP_UPLOAD_FOLDER = os.path.join(BASE_DIR, 'temp_uploads')
 if not os.path.exists(TEMP_UPLOAD_FOLDER):
     os.makedirs(TEMP_UPLOAD_FOLDER)
+
+# File d'attente des traitements
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_STATE_FOLDER = os.path.join(TEMP_UPLOAD_FOLDER, 'jobs')
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', 24 * 3600))  # secondes
+# Registre des fichiers produits par chaque plan, conservé au-delà de JOB_RETENTION pour les exports
+PLAN_RECORD_FOLDER = os.getenv('PLAN_RECORD_FOLDER', os.path.join(BASE_DIR, 'plan_records'))
+# Rafraîchissement des traitements actifs par leur worker, et délai au-delà duquel
+# un traitement non rafraîchi est considéré comme abandonné
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', 5))  # secondes
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', 60))  # secondes
+
+# Nombre de processus OCR (1 = OCR séquentiel dans le worker web)
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', 1))
+
+# Résolution de rastérisation des pages avant OCR
+OCR_DPI = int(os.getenv('OCR_DPI', 200))
+
+# Lecture directe de la couche texte des PDF vectoriels avant l'OCR
+USE_TEXT_LAYER = os.getenv('USE_TEXT_LAYER', 'True').lower() == 'true'
+# Nombre minimal de paires X/Y trouvées dans la couche texte d'une page pour se passer de l'OCR
+TEXT_LAYER_MIN_PAIRS = int(os.getenv('TEXT_LAYER_MIN_PAIRS', 1))
+
+# Cache disque des résultats d'extraction
+CACHE_FOLDER = os.getenv('CACHE_FOLDER', os.path.join(BASE_DIR, 'cache'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Réutilisation des détections OCR des pages inchangées d'un plan révisé
+USE_PAGE_CACHE = os.getenv('USE_PAGE_CACHE', 'True').lower() == 'true'
+
+# OCR limité aux zones de tableaux détectées (repli sur la page entière si aucune)
+OCR_ROI = os.getenv('OCR_ROI', 'False').lower() == 'true'
+
+# OCR par lots : nombre de pages (ou zones) par lot de détection,
+# et nombre de zones de texte par lot de reconnaissance
+OCR_BATCH_SIZE = int(os.getenv('OCR_BATCH_SIZE', 1))
+OCR_RECOGNIZER_BATCH_SIZE = int(os.getenv('OCR_RECOGNIZER_BATCH_SIZE', 1))
+
+# Serveur OCR partagé (socket Unix) : si défini, les workers web ne chargent pas les modèles
+OCR_SERVER_SOCKET = os.getenv('OCR_SERVER_SOCKET', '')
+OCR_SERVER_MAX_BATCH = int(os.getenv('OCR_SERVER_MAX_BATCH', 8))
+OCR_SERVER_MAX_WAIT = float(os.getenv('OCR_SERVER_MAX_WAIT', 0.01))  # secondes
+
+# Préchauffage des modèles OCR au démarrage de chaque worker gunicorn.
+# /ready (healthCheckPath de render.yaml) n'annonce le worker prêt qu'une fois les modèles
+# chargés. Sans préchauffage (False), les modèles ne se chargent qu'au premier OCR et /ready
+# ne vérifie plus que le stockage : le premier traitement paie alors le chargement.
+WARMUP_ON_BOOT = os.getenv('WARMUP_ON_BOOT', 'True').lower() == 'true'
+
+# Uploads Google Drive : parallélisme et relances des erreurs transitoires
+DRIVE_UPLOAD_CONCURRENCY = int(os.getenv('DRIVE_UPLOAD_CONCURRENCY', 4))
+DRIVE_MAX_RETRIES = int(os.getenv('DRIVE_MAX_RETRIES', 3))
+DRIVE_RETRY_BACKOFF = float(os.getenv('DRIVE_RETRY_BACKOFF', 1.0))  # secondes
+
+# Cache des métadonnées Google Drive (taille, durée de vie, durée des réponses « introuvable »)
+DRIVE_METADATA_CACHE_SIZE = int(os.getenv('DRIVE_METADATA_CACHE_SIZE', 4096))
+DRIVE_METADATA_TTL = int(os.getenv('DRIVE_METADATA_TTL', 3600))  # secondes
+DRIVE_METADATA_NEGATIVE_TTL = int(os.getenv('DRIVE_METADATA_NEGATIVE_TTL', 60))  # secondes
+
+# Stockage des fichiers produits : 'drive' (Google Drive) ou 'local' (UPLOAD_FOLDER, servi par l'application)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'drive').lower()
+
+# Nombre maximal de traitements regroupés dans un export ZIP
+EXPORT_MAX_JOBS = int(os.getenv('EXPORT_MAX_JOBS', 500))
+
+# Visionneuse des coordonnées : taille maximale d'une page de l'API,
+# nombre d'index de CSV gardés en mémoire et leur durée de vie
+COORDINATES_MAX_PAGE_SIZE = int(os.getenv('COORDINATES_MAX_PAGE_SIZE', 1000))
+CSV_INDEX_CACHE_SIZE = int(os.getenv('CSV_INDEX_CACHE_SIZE', 32))
+CSV_INDEX_TTL = int(os.getenv('CSV_INDEX_TTL', 3600))  # secondes
+
+# Rapports PDF : au-delà de ce nombre de points, la distribution est rendue en densité (hexbin)
+REPORT_MAX_SCATTER_POINTS = int(os.getenv('REPORT_MAX_SCATTER_POINTS', 5000))
+# Durée pendant laquelle la clé de rapport d'un CSV (hash de son contenu) est mémorisée,
+# et nombre de rapports générés en parallèle (pool distinct de celui des OCR)
+REPORT_KEY_TTL = int(os.getenv('REPORT_KEY_TTL', 24 * 3600))  # secondes
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 1))
+
+# Durée maximale du suivi en continu (NDJSON) des traitements d'un envoi
+JOB_STREAM_TIMEOUT = int(os.getenv('JOB_STREAM_TIMEOUT', 3600))  # secondes
+
+# Envois reprenables par morceaux : taille maximale d'un fichier, taille d'un morceau
+# (inférieure à MAX_CONTENT_LENGTH) et durée de conservation d'un envoi abandonné
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 1024 * 1024 * 1024))  # 1 Go
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))  # 8 Mo
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 86400))  # secondes
+
+# Formats de coordonnées produits en plus du CSV : geojson, parquet, arrow (ces deux derniers demandent pyarrow)
+COORDINATE_FORMATS = os.getenv('COORDINATE_FORMATS', 'geojson,parquet')
+# Système de coordonnées des plans déclaré dans le GeoJSON (ex. EPSG:32630), vide si inconnu
+COORDINATE_CRS = os.getenv('COORDINATE_CRS', '')
+
+# Taille au-delà de laquelle un plan reçu ou un fichier produit quitte la mémoire
+# pour un fichier temporaire anonyme dans TEMP_UPLOAD_FOLDER
+PLAN_MEMORY_THRESHOLD = int(os.getenv('PLAN_MEMORY_THRESHOLD', 32 * 1024 * 1024))  # 32 Mo
+# Mémoire totale (par processus) des plans gardés en mémoire en attendant ou pendant
+# leur traitement ; au-delà, les plans suivants passent par un fichier temporaire anonyme
+PLAN_MEMORY_BUDGET = int(os.getenv('PLAN_MEMORY_BUDGET', 64 * 1024 * 1024))  # 64 Mo
+
+# Profil d'inférence CPU : 'accurate' (modèles float32), 'balanced' (int8) ou 'fast' (int8, DPI réduite)
+OCR_PROFILE = os.getenv('OCR_PROFILE', 'balanced')
+# Threads torch/OpenCV par processus d'inférence (0 = répartir les cœurs entre les inférences simultanées)
+OCR_THREADS = int(os.getenv('OCR_THREADS', 0))
+# Nombre de workers gunicorn de l'instance (--workers), pour la répartition des cœurs
+WEB_WORKERS = int(os.getenv('WEB_CONCURRENCY', 2))
+
+# Prétraitement des pages avant l'OCR : rendu en niveaux de gris, redressement des scans
+# inclinés et binarisation adaptative (chiffres fins sur fond de scan inégal)
+OCR_GRAYSCALE = os.getenv('OCR_GRAYSCALE', 'True').lower() == 'true'
+OCR_DESKEW = os.getenv('OCR_DESKEW', 'False').lower() == 'true'
+OCR_BINARIZE = os.getenv('OCR_BINARIZE', 'False').lower() == 'true'
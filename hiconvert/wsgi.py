@@ -1,6 +1,10 @@
 import os
+import time
+import logging
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hiconvert.settings')
 
+_boot_start = time.perf_counter()
 application = get_wsgi_application()
+logging.getLogger(__name__).info(f"Application chargée en {time.perf_counter() - _boot_start:.2f} s")